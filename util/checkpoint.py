@@ -0,0 +1,154 @@
+import json
+import os
+import time
+
+"""
+Append-only progress file for long wordlist runs.
+
+Every line is a JSON object:
+    {"wordlist": "...", "size": 139921497,       one per run, identifies the
+     "mtime": 1719640000, "started": 1719650000}  wordlist the offsets point into
+    {"offset": 16384}                            highest contiguous completed line
+    {"hit": "1qaz2wsx", "offset": 16390}         possible credentials
+    {"skipped": "letmein", "offset": 16400}      given up on, never tested
+
+Only the last "offset" record matters on resume, and only for the wordlist of
+the run that wrote it: byte offsets into an edited or different file land in
+the middle of unrelated lines, so load() refuses a wordlist whose path, size or
+mtime changed. Lines are never rewritten so a crash mid-write can at worst lose
+the final, partial record.
+"""
+
+
+class CheckpointError(ValueError):
+    pass
+
+
+def wordlist_stamp(wordlist):
+    """{"wordlist", "size", "mtime"} of a wordlist file, as written in the run header."""
+    path = os.path.abspath(os.path.expanduser(wordlist))
+    stat = os.stat(path)
+    return {"wordlist": path, "size": stat.st_size, "mtime": int(stat.st_mtime)}
+
+
+class Checkpoint:
+    def __init__(self, path, interval=5.0):
+        self.path = os.path.expanduser(path)
+        self.interval = interval
+        self.file = None
+        # offset -> outstanding candidates, in the order they were handed out
+        self.pending = {}
+        self.completed = None
+        self.saved = None
+        self.last_save = time.monotonic()
+
+    @staticmethod
+    def load(path, wordlist=None):
+        """
+        Returns (last completed offset or None, list of hits, list of skipped
+        candidates) from a checkpoint file. With `wordlist`, raises
+        CheckpointError unless it is the file the offset was recorded against.
+        """
+        offset, hits, skipped = None, [], []
+        run = recorded = None
+        try:
+            with open(os.path.expanduser(path), "r") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from a crash
+                    if "hit" in record:
+                        hits.append(record)
+                    elif "skipped" in record:
+                        skipped.append(record)
+                    elif "offset" in record:
+                        offset = record["offset"]
+                        recorded = run
+                    elif "wordlist" in record:
+                        run = record
+        except FileNotFoundError:
+            pass
+        if wordlist is not None and offset is not None:
+            Checkpoint.verify(recorded or {}, wordlist)
+        return offset, hits, skipped
+
+    @staticmethod
+    def verify(run, wordlist):
+        stamp = wordlist_stamp(wordlist)
+        if "size" not in run:
+            raise CheckpointError("checkpoint does not record which wordlist it was made from")
+        for key in ("wordlist", "size", "mtime"):
+            if run.get(key) != stamp[key]:
+                raise CheckpointError(
+                    f"checkpoint was made from {run.get('wordlist')} "
+                    f"({run.get('size')} bytes, mtime {run.get('mtime')}), "
+                    f"{stamp['wordlist']} is {stamp['size']} bytes, mtime {stamp['mtime']}"
+                )
+
+    def open(self, wordlist):
+        self.file = open(self.path, "a")
+        self._write(dict(wordlist_stamp(wordlist), started=int(time.time())))
+        return self
+
+    def close(self):
+        if self.file is None:
+            return
+        self.save()
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def started(self, offset, count=1):
+        """
+        Registers `count` candidates for `offset`. Every candidate of a word has
+        to be registered before the first one is handed out, or a fast worker
+        can finish the word while the rest of it is still waiting to be queued.
+        """
+        self.pending[offset] = self.pending.get(offset, 0) + count
+
+    def finished(self, offset):
+        self.pending[offset] -= 1
+        # advance over every leading offset that has nothing left in flight
+        while self.pending:
+            first = next(iter(self.pending))
+            if self.pending[first]:
+                break
+            del self.pending[first]
+            self.completed = first
+
+        if time.monotonic() - self.last_save >= self.interval:
+            self.save()
+
+    def hit(self, offset, word):
+        self._write({"hit": word, "offset": offset})
+
+    def skipped(self, offset, word):
+        """
+        A candidate given up on. It is written down and counted as finished, so
+        one dead candidate doesn't hold the resume point back for the rest of the run.
+        """
+        self._write({"skipped": word, "offset": offset})
+        self.finished(offset)
+
+    def save(self):
+        self.last_save = time.monotonic()
+        if self.completed is not None and self.completed != self.saved:
+            self._write({"offset": self.completed})
+            self.saved = self.completed
+
+    @staticmethod
+    def resume_offset(completed):
+        # the completed line starts at `completed`; any offset inside it makes
+        # iter_wordlist() skip to the next line without reading what came before
+        return 0 if completed is None else completed + 1
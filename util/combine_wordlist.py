@@ -1,21 +1,111 @@
 import argparse
+import heapq
+import os
+import tempfile
 
-def combine_wordlists(w1, w2, output):
-    with open(w1, 'r') as f1:
-        words = set([w.strip() for w in f1.readlines()])
+"""
+Merge any number of wordlists into one sorted, deduplicated list.
 
-    with open(w2, 'r') as f2:
-        words.update(set([w.strip() for w in f2.readlines()]))
+Works on raw bytes (no decoding) and in bounded memory: words are collected
+until the --memory budget is used up, that chunk is sorted and spilled to a
+temporary run file, and the runs are k-way merged at the end, dropping
+duplicates on the fly. Lists that fit in the budget never touch the disk.
 
-    with open(output, 'w') as out_file:
+python3 util/combine_wordlist.py -w rockyou.txt -w seclists.txt -o combined.txt --memory 512M
+python3 util/combine_wordlist.py -w1 a.txt -w2 b.txt -o out.txt
+"""
+
+# rough per-word cost of a bytes object inside a set, used against the budget
+WORD_OVERHEAD = 90
+# merge at most this many runs at once to stay well under the open file limit
+MAX_FANIN = 256
+
+
+def parse_size(value):
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    value = value.strip().upper().rstrip("B")
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def spill(words, directory):
+    run = tempfile.NamedTemporaryFile("wb", dir=directory, delete=False, suffix=".run")
+    with run:
         for word in sorted(words):
-            out_file.write(word + '\n')
+            run.write(word + b"\n")
+    return run.name
+
+
+def read_run(path):
+    with open(path, "rb") as file:
+        for line in file:
+            yield line[:-1]
+
+
+def unique(words):
+    previous = None
+    for word in words:
+        if word != previous:
+            yield word
+            previous = word
+
+
+def merge_runs(runs, directory):
+    # merge in passes when there are more runs than we want open at once
+    while len(runs) > MAX_FANIN:
+        merged = []
+        for i in range(0, len(runs), MAX_FANIN):
+            group = runs[i : i + MAX_FANIN]
+            run = tempfile.NamedTemporaryFile("wb", dir=directory, delete=False, suffix=".run")
+            with run:
+                for word in unique(heapq.merge(*[read_run(p) for p in group])):
+                    run.write(word + b"\n")
+            for path in group:
+                os.remove(path)
+            merged.append(run.name)
+        runs = merged
+    return unique(heapq.merge(*[read_run(p) for p in runs]))
+
+
+def combine_wordlists(inputs, output, memory=256 << 20):
+    with tempfile.TemporaryDirectory(prefix="wordlist-") as directory:
+        runs, chunk, used = [], set(), 0
+        for path in inputs:
+            with open(os.path.expanduser(path), "rb") as file:
+                for line in file:
+                    word = line.strip()
+                    if not word or word in chunk:
+                        continue
+                    chunk.add(word)
+                    used += len(word) + WORD_OVERHEAD
+                    if used >= memory:
+                        runs.append(spill(chunk, directory))
+                        chunk, used = set(), 0
+
+        if runs:
+            if chunk:
+                runs.append(spill(chunk, directory))
+            chunk = None
+            words = merge_runs(runs, directory)
+        else:
+            words = sorted(chunk)
+
+        with open(output, "wb") as out_file:
+            for word in words:
+                out_file.write(word + b"\n")
+
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description='Combine two wordlists and write to a new file.')
-    parser.add_argument('-w1', '--wordlist1', required=True, help='First wordlist file.')
-    parser.add_argument('-w2', '--wordlist2', required=True, help='Second wordlist file.')
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Combine wordlists and write to a new file.')
+    parser.add_argument('-w', '--wordlist', action='append', default=[], help='Wordlist file, repeat for more.')
+    parser.add_argument('-w1', '--wordlist1', help='First wordlist file.')
+    parser.add_argument('-w2', '--wordlist2', help='Second wordlist file.')
     parser.add_argument('-o', '--output', required=True, help='Output file name.')
+    parser.add_argument('-m', '--memory', default='256M', help='Memory budget, e.g. 512M or 2G.')
     args = parser.parse_args()
 
-    combine_wordlists(args.wordlist1, args.wordlist2, args.output)
+    inputs = [w for w in (args.wordlist1, args.wordlist2) if w] + args.wordlist
+    if not inputs:
+        parser.error('give at least one wordlist')
+    combine_wordlists(inputs, args.output, parse_size(args.memory))
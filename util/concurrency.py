@@ -0,0 +1,239 @@
+import asyncio
+import errno
+import socket
+import threading
+import time
+
+"""
+AIMD (additive increase, multiplicative decrease) concurrency control.
+
+The controller itself does no I/O, it only keeps the current limit:
+
+    every handshake that gets an answer         -> limit += 1 / limit  (about +1 per window)
+    a reset / banner timeout / MaxStartups drop -> limit *= 0.5, at most once per cooldown
+
+ThreadGate and AsyncGate wrap it for thread pools and asyncio tasks: a slot is
+taken before connecting and given back afterwards, and callers report the
+outcome so the limit settles just under what the target tolerates.
+
+    gate = ThreadGate(AIMD(initial=4, maximum=32))
+    with gate:
+        try:
+            connect()
+            gate.success()
+        except Exception as e:
+            if is_fatal(e):
+                raise              # nothing listening, stop the run
+            if is_throttle(e):
+                gate.throttled()   # then retry the same attempt
+
+Only errors from before the handshake completes say anything about load. A
+disconnect after the server started answering is its own doing, e.g. OpenSSH
+closing with "Too many authentication failures" at MaxAuthTries.
+"""
+
+# what servers do when they shed load: OpenSSH MaxStartups drops the
+# connection before or during the banner, overloaded hosts reset or time out
+THROTTLE_ERRORS = (
+    EOFError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+    TimeoutError,
+    socket.timeout,
+)
+THROTTLE_MESSAGES = (
+    "banner",
+    "connection lost",
+    "connection reset",
+    "connection closed",
+    "maxstartups",
+    "timed out",
+)
+
+
+def is_throttle(error):
+    """
+    True for errors that mean "slow down" rather than "wrong password" or "bad
+    target". Only meaningful for errors raised before the handshake completed.
+    """
+    if is_fatal(error):
+        return False
+    if isinstance(error, THROTTLE_ERRORS):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in THROTTLE_MESSAGES)
+
+
+def is_fatal(error):
+    """True when nothing is listening, retrying or slowing down won't help."""
+    # paramiko wraps the per-address errors in NoValidConnectionsError.errors
+    errors = getattr(error, "errors", None)
+    if isinstance(errors, dict) and errors:
+        return all(is_fatal(e) for e in errors.values())
+    return isinstance(error, ConnectionRefusedError) or (
+        isinstance(error, OSError) and error.errno == errno.ECONNREFUSED
+    )
+
+
+class Backoff:
+    """
+    Failure count and exponential backoff for one retrying worker. Throttling
+    is expected while the gate searches for the limit, it only counts as
+    failing once concurrency is already at the minimum.
+    """
+
+    def __init__(self, gate, max_failures=10, base=0.5, cap=10.0):
+        self.gate = gate
+        self.max_failures = max_failures
+        self.base = base
+        self.cap = cap
+        self.failures = 0
+        self.attempt = 0
+
+    def failed(self, throttled=False):
+        """Records a failed connection, True once max_failures were reached in a row."""
+        if not throttled or self.gate.limit <= self.gate.controller.minimum:
+            self.failures += 1
+        return self.failures >= self.max_failures
+
+    def delay(self):
+        """Seconds to wait before the next attempt, doubling up to `cap`."""
+        delay = min(self.base * 2 ** self.attempt, self.cap)
+        self.attempt += 1
+        return delay
+
+    def reset(self):
+        """The target answered, start counting from scratch."""
+        self.failures = self.attempt = 0
+
+
+def retry_throttled(gate, attempt, stop, errors, max_retries=10):
+    """
+    Runs attempt() holding a slot of `gate` (a ThreadGate) and returns its
+    result. Throttled attempts never reached the password check, so they are
+    retried with backoff until max_retries of them count as failures (see
+    Backoff). Other `errors`, and the last throttle when the retries run out,
+    are raised. Returns None once `stop` is set.
+    """
+    backoff = Backoff(gate, max_retries)
+    while not stop.is_set():
+        with gate:
+            try:
+                return attempt()
+            except errors as e:
+                if not is_throttle(e):
+                    raise
+                gate.throttled()
+                if backoff.failed(throttled=True):
+                    raise
+                print(f"[-] Throttled ({e.__class__.__name__}), concurrency now {gate.limit}, retrying...")
+        time.sleep(backoff.delay())
+    return None
+
+
+class AIMD:
+    def __init__(
+        self, initial=4, minimum=1, maximum=64, increase=1.0, decrease=0.5, cooldown=1.0,
+        clock=time.monotonic,
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.clock = clock
+        self.value = float(min(max(initial, minimum), maximum))
+        self.last_decrease = None
+        self.throttles = 0
+
+    @property
+    def limit(self):
+        return max(self.minimum, int(self.value))
+
+    def success(self):
+        self.value = min(self.maximum, self.value + self.increase / self.limit)
+
+    def throttled(self):
+        # a burst of resets from one overload only halves the limit once
+        now = self.clock()
+        self.throttles += 1
+        if self.last_decrease is not None and now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.value = max(self.minimum, self.value * self.decrease)
+
+
+class ThreadGate:
+    def __init__(self, controller):
+        self.controller = controller
+        self.active = 0
+        self.condition = threading.Condition()
+
+    @property
+    def limit(self):
+        return self.controller.limit
+
+    def acquire(self):
+        with self.condition:
+            while self.active >= self.controller.limit:
+                self.condition.wait()
+            self.active += 1
+
+    def release(self):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def success(self):
+        with self.condition:
+            self.controller.success()
+            self.condition.notify_all()
+
+    def throttled(self):
+        with self.condition:
+            self.controller.throttled()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AsyncGate:
+    def __init__(self, controller):
+        self.controller = controller
+        self.active = 0
+        self.condition = asyncio.Condition()
+
+    @property
+    def limit(self):
+        return self.controller.limit
+
+    async def acquire(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < self.controller.limit)
+            self.active += 1
+
+    async def release(self):
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    async def success(self):
+        async with self.condition:
+            self.controller.success()
+            self.condition.notify_all()
+
+    async def throttled(self):
+        async with self.condition:
+            self.controller.throttled()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.release()
@@ -0,0 +1,279 @@
+import asyncio
+import ipaddress
+import socket
+import itertools
+import random
+import secrets
+import struct
+
+"""
+Minimal asyncio DNS stub resolver (A / AAAA / CNAME over UDP), standard library only.
+
+Queries are spread round-robin over a pool of resolvers, a timed out query is
+retried on the next one. Answers are cached for the run, NXDOMAIN included, so
+repeated names never hit the wire twice.
+
+    pool = ResolverPool(["1.1.1.1", "127.0.0.1:5353"])
+    records = await pool.resolve("www.example.com")
+    # {"A": ["93.184.216.34"], "AAAA": [...], "CNAME": [...]} or None
+
+PoolResolver plugs the same answers into aiohttp, so HTTP probes connect to
+the addresses found here instead of asking the system resolver again.
+"""
+
+TYPE_A = 1
+TYPE_CNAME = 5
+TYPE_AAAA = 28
+# NOERROR and NXDOMAIN are final, SERVFAIL / REFUSED are retried elsewhere
+FINAL_RCODES = {0, 3}
+
+
+class DNSError(Exception):
+    pass
+
+
+def encode_name(name):
+    """Wire format of `name`, DNSError for names no resolver would accept."""
+    try:
+        labels = name.rstrip(".").encode("idna").split(b".")
+    except UnicodeError as e:
+        raise DNSError(f"invalid name {name!r}: {e}")
+    for label in labels:
+        if not label or len(label) > 63:
+            raise DNSError(f"invalid name {name!r}: labels must be 1 to 63 bytes")
+    encoded = b"".join(bytes([len(label)]) + label for label in labels) + b"\x00"
+    if len(encoded) > 255:
+        raise DNSError(f"invalid name {name!r}: longer than 255 bytes")
+    return encoded
+
+
+def build_query(query_id, name, qtype):
+    header = struct.pack("!HHHHHH", query_id, 0x0100, 1, 0, 0, 0)  # RD set
+    return header + encode_name(name) + struct.pack("!HH", qtype, 1)
+
+
+def _read_name(data, offset):
+    labels = []
+    jumped, end = False, offset
+    for _ in range(128):  # guards against compression loops
+        length = data[offset]
+        if length & 0xC0 == 0xC0:
+            if not jumped:
+                end = offset + 2
+            offset = struct.unpack_from("!H", data, offset)[0] & 0x3FFF
+            jumped = True
+            continue
+        if length == 0:
+            if not jumped:
+                end = offset + 1
+            return ".".join(labels), end
+        labels.append(data[offset + 1 : offset + 1 + length].decode("ascii", "replace"))
+        offset += 1 + length
+    raise DNSError("compression loop in response")
+
+
+def parse_response(data):
+    """Returns (query id, rcode, [(type name, value)])."""
+    query_id, flags, qdcount, ancount, _, _ = struct.unpack_from("!HHHHHH", data)
+    offset = 12
+    for _ in range(qdcount):
+        _, offset = _read_name(data, offset)
+        offset += 4
+
+    answers = []
+    for _ in range(ancount):
+        _, offset = _read_name(data, offset)
+        rtype, _, _, rdlength = struct.unpack_from("!HHIH", data, offset)
+        offset += 10
+        rdata = data[offset : offset + rdlength]
+        if rtype == TYPE_A:
+            answers.append(("A", str(ipaddress.IPv4Address(rdata))))
+        elif rtype == TYPE_AAAA:
+            answers.append(("AAAA", str(ipaddress.IPv6Address(rdata))))
+        elif rtype == TYPE_CNAME:
+            answers.append(("CNAME", _read_name(data, offset)[0]))
+        offset += rdlength
+    return query_id, flags & 0x000F, answers
+
+
+class _ResolverProtocol(asyncio.DatagramProtocol):
+    def __init__(self):
+        self.pending = {}
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            query_id = struct.unpack_from("!H", data)[0]
+        except struct.error:
+            return
+        future = self.pending.pop(query_id, None)
+        if future is not None and not future.done():
+            future.set_result(data)
+
+    def error_received(self, exc):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        self.pending.clear()
+
+
+def parse_resolver(value):
+    """'1.1.1.1' or '127.0.0.1:5353' -> (host, port), bare IPv6 addresses use port 53."""
+    if value.count(":") == 1:
+        host, port = value.split(":")
+        return host, int(port)
+    return value, 53
+
+
+def system_resolvers():
+    resolvers = []
+    try:
+        with open("/etc/resolv.conf") as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == "nameserver":
+                    resolvers.append(parts[1])
+    except OSError:
+        pass
+    return resolvers or ["1.1.1.1", "8.8.8.8"]
+
+
+class ResolverPool:
+    def __init__(self, resolvers=None, timeout=2.0, retries=2):
+        self.resolvers = [parse_resolver(r) for r in (resolvers or system_resolvers())]
+        self.timeout = timeout
+        self.retries = retries
+        self.protocols = {}
+        self.rotation = itertools.cycle(range(len(self.resolvers)))
+        self.cache = {}
+        self.inflight = {}
+        self.queries = 0
+        self.cache_hits = 0
+
+    async def _protocol(self, resolver):
+        if resolver not in self.protocols:
+            loop = asyncio.get_running_loop()
+            _, protocol = await loop.create_datagram_endpoint(
+                _ResolverProtocol, remote_addr=resolver
+            )
+            self.protocols[resolver] = protocol
+        return self.protocols[resolver]
+
+    def close(self):
+        for protocol in self.protocols.values():
+            protocol.transport.close()
+        self.protocols.clear()
+
+    async def query(self, name, qtype):
+        """Returns (rcode, answers), trying the next resolver on timeout."""
+        loop = asyncio.get_running_loop()
+        for _ in range(self.retries + 1):
+            resolver = self.resolvers[next(self.rotation)]
+            protocol = await self._protocol(resolver)
+            query_id = random.getrandbits(16)
+            while query_id in protocol.pending:
+                query_id = random.getrandbits(16)
+            future = loop.create_future()
+            protocol.pending[query_id] = future
+            self.queries += 1
+            protocol.transport.sendto(build_query(query_id, name, qtype))
+            try:
+                data = await asyncio.wait_for(future, self.timeout)
+            except (asyncio.TimeoutError, OSError):
+                protocol.pending.pop(query_id, None)
+                continue
+            try:
+                _, rcode, answers = parse_response(data)
+            except (struct.error, IndexError, ValueError, DNSError):
+                continue
+            if rcode in FINAL_RCODES:
+                return rcode, answers
+        raise DNSError(f"no answer for {name} from {len(self.resolvers)} resolvers")
+
+    async def resolve(self, name):
+        """
+        {"A": [...], "AAAA": [...], "CNAME": [...]}, or None when the name does
+        not resolve. Raises DNSError for names that can't be put in a query.
+        """
+        name = name.rstrip(".").lower()
+        if name in self.cache:
+            self.cache_hits += 1
+            return self.cache[name]
+        encode_name(name)
+        if name in self.inflight:
+            # somebody is already asking, share their answer
+            self.cache_hits += 1
+            return await asyncio.shield(self.inflight[name])
+
+        task = asyncio.ensure_future(self._resolve(name))
+        self.inflight[name] = task
+        task.add_done_callback(lambda _: self.inflight.pop(name, None))
+        return await asyncio.shield(task)
+
+    async def _resolve(self, name):
+        results = await asyncio.gather(
+            self.query(name, TYPE_A), self.query(name, TYPE_AAAA), return_exceptions=True
+        )
+        records = {"A": [], "AAAA": [], "CNAME": []}
+        answered = True
+        for result in results:
+            if isinstance(result, DNSError):
+                answered = False  # unknown, don't cache a negative we never saw
+                continue
+            if isinstance(result, BaseException):
+                raise result
+            _, answers = result
+            for record_type, value in answers:
+                if value not in records[record_type]:
+                    records[record_type].append(value)
+
+        resolved = records if records["A"] or records["AAAA"] else None
+        if resolved is not None or answered:
+            # NXDOMAIN and empty answers are cached as None
+            self.cache[name] = resolved
+        return resolved
+
+    async def wildcard_addresses(self, domain, probes=3):
+        """Addresses random labels under `domain` resolve to, empty when there is no wildcard."""
+        addresses = set()
+        for _ in range(probes):
+            records = await self.resolve(f"{secrets.token_hex(10)}.{domain}")
+            if records:
+                addresses.update(records["A"] + records["AAAA"])
+        return addresses
+
+
+class PoolResolver:
+    """aiohttp resolver (TCPConnector(resolver=...)) backed by a ResolverPool."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        records = await self.pool.resolve(host)
+        if not records:
+            raise OSError(f"{host} does not resolve")
+        hosts = []
+        for address in records["A"] + records["AAAA"]:
+            address_family = socket.AF_INET6 if ":" in address else socket.AF_INET
+            if family not in (socket.AF_UNSPEC, address_family):
+                continue
+            hosts.append(
+                {
+                    "hostname": host,
+                    "host": address,
+                    "port": port,
+                    "family": address_family,
+                    "proto": 0,
+                    "flags": socket.AI_NUMERICHOST,
+                }
+            )
+        if not hosts:
+            raise OSError(f"{host} has no address for family {family}")
+        return hosts
+
+    async def close(self):
+        pass
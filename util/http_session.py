@@ -0,0 +1,72 @@
+import aiohttp
+
+"""
+Shared aiohttp session factory for the async HTTP tools.
+
+The connector is sized to the tool's concurrency so no request queues behind
+aiohttp's default limit of 100, keeps connections alive between requests and
+caches DNS answers, which matters when every request goes to the same host.
+
+    session, stats = create_session(concurrent_limit)
+    async with session:
+        ...
+    print(stats.summary())
+"""
+
+
+class ConnectionStats:
+    def __init__(self):
+        self.created = 0
+        self.reused = 0
+        self.dns_hits = 0
+        self.dns_misses = 0
+
+    def trace_config(self):
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_create)
+        trace_config.on_connection_reuseconn.append(self._on_reuse)
+        trace_config.on_dns_cache_hit.append(self._on_dns_hit)
+        trace_config.on_dns_cache_miss.append(self._on_dns_miss)
+        return trace_config
+
+    async def _on_create(self, session, context, params):
+        self.created += 1
+
+    async def _on_reuse(self, session, context, params):
+        self.reused += 1
+
+    async def _on_dns_hit(self, session, context, params):
+        self.dns_hits += 1
+
+    async def _on_dns_miss(self, session, context, params):
+        self.dns_misses += 1
+
+    @property
+    def reuse_ratio(self):
+        total = self.created + self.reused
+        return self.reused / total if total else 0.0
+
+    def summary(self):
+        return (
+            f"connections: {self.created} opened, {self.reused} reused "
+            f"({self.reuse_ratio:.1%}), dns cache: {self.dns_hits} hits, "
+            f"{self.dns_misses} misses"
+        )
+
+
+def create_session(
+    concurrent_limit, dns_ttl=300, keepalive_timeout=30, resolver=None, **kwargs
+):
+    """Returns (aiohttp.ClientSession, ConnectionStats)."""
+    stats = ConnectionStats()
+    connector = aiohttp.TCPConnector(
+        limit=concurrent_limit,
+        limit_per_host=concurrent_limit,
+        ttl_dns_cache=dns_ttl,
+        keepalive_timeout=keepalive_timeout,
+        resolver=resolver,
+    )
+    session = aiohttp.ClientSession(
+        connector=connector, trace_configs=[stats.trace_config()], **kwargs
+    )
+    return session, stats
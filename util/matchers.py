@@ -0,0 +1,194 @@
+import argparse
+import re
+
+"""
+ffuf style response matchers and filters.
+
+A response is a hit when any matcher matches (or no matchers are set) and no
+filter matches. Status, size (from Content-Length) and time only look at the
+response head, so when nothing else is configured the body is never read.
+
+    -mc / -fc   status codes        200,301-399
+    -ms / -fs   size in bytes       0,4242
+    -mw / -fw   word count          57
+    -ml / -fl   line count          10-20
+    -mr / -fr   regex on the body   "Login failed"
+    -mt / -ft   response time (ms)  ">500" or "<100"
+"""
+
+
+class ResponseInfo:
+    def __init__(self, status, content_length, body, elapsed, location=None):
+        self.status = status
+        self.content_length = content_length
+        self.body = body  # bytes, or None when it was not read
+        self.elapsed = elapsed  # seconds until the response head arrived
+        self.location = location  # Location header of redirects
+
+    @property
+    def size(self):
+        if self.content_length is not None:
+            return self.content_length
+        return None if self.body is None else len(self.body)
+
+    @property
+    def words(self):
+        return len(self.body.split())
+
+    @property
+    def lines(self):
+        return self.body.count(b"\n") + 1
+
+
+def parse_ranges(value):
+    """'200,300-399' -> [(200, 200), (300, 399)]"""
+    ranges = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        low, _, high = part.partition("-")
+        ranges.append((int(low), int(high or low)))
+    return ranges
+
+
+class RangeMatcher:
+    """Matches when the ResponseInfo attribute named by `field` falls in one of the ranges."""
+
+    field = None
+    needs_body = False
+    needs_size = False
+
+    def __init__(self, value):
+        self.ranges = parse_ranges(value)
+
+    def value(self, response):
+        return getattr(response, self.field)
+
+    def __call__(self, response):
+        value = self.value(response)
+        return any(low <= value <= high for low, high in self.ranges)
+
+
+class StatusMatcher(RangeMatcher):
+    field = "status"
+
+
+class SizeMatcher(RangeMatcher):
+    field = "size"
+    # Content-Length is enough unless the server leaves it out
+    needs_size = True
+
+
+class WordsMatcher(RangeMatcher):
+    field = "words"
+    needs_body = True
+
+
+class LinesMatcher(RangeMatcher):
+    field = "lines"
+    needs_body = True
+
+
+class RegexMatcher:
+    needs_body = True
+    needs_size = False
+
+    def __init__(self, pattern):
+        # compiled as bytes so the body never has to be decoded
+        self.pattern = re.compile(pattern.encode())
+
+    def __call__(self, response):
+        return self.pattern.search(response.body) is not None
+
+
+class TimeMatcher:
+    needs_body = False
+    needs_size = False
+
+    def __init__(self, value):
+        value = value.strip()
+        if value[:1] not in ("<", ">"):
+            raise ValueError(f"time matcher must look like '>500' or '<100': {value}")
+        self.greater = value[0] == ">"
+        self.limit = int(value[1:]) / 1000
+
+    def __call__(self, response):
+        if self.greater:
+            return response.elapsed > self.limit
+        return response.elapsed < self.limit
+
+
+class MatcherSet:
+    def __init__(self, matchers=None, filters=None):
+        self.matchers = matchers or []
+        self.filters = filters or []
+        every = self.matchers + self.filters
+        self.needs_body = any(m.needs_body for m in every)
+        self.needs_size = any(m.needs_size for m in every)
+
+    def __bool__(self):
+        return bool(self.matchers or self.filters)
+
+    def wants_body(self, content_length):
+        return self.needs_body or (self.needs_size and content_length is None)
+
+    @staticmethod
+    def _decided_by_head(matcher, response):
+        return not matcher.needs_body and (not matcher.needs_size or response.size is not None)
+
+    def rejects_head(self, response):
+        """
+        True when status, size and time alone already rule out a hit, so the
+        body never has to be read. Matchers that need the body are left undecided.
+        """
+        if any(self._decided_by_head(f, response) and f(response) for f in self.filters):
+            return True
+        if self.matchers and all(self._decided_by_head(m, response) for m in self.matchers):
+            return not any(m(response) for m in self.matchers)
+        return False
+
+    def is_hit(self, response):
+        if self.matchers and not any(m(response) for m in self.matchers):
+            return False
+        return not any(f(response) for f in self.filters)
+
+
+MATCHER_TYPES = {
+    "c": ("status code", StatusMatcher),
+    "s": ("response size", SizeMatcher),
+    "w": ("word count", WordsMatcher),
+    "l": ("line count", LinesMatcher),
+    "r": ("regex", RegexMatcher),
+    "t": ("response time in ms, '>500' or '<100'", TimeMatcher),
+}
+
+
+def matcher_argument(matcher_type):
+    """argparse type that builds the matcher, so a bad value ends in parser.error()."""
+
+    def parse(value):
+        try:
+            return matcher_type(value)
+        except (ValueError, re.error) as e:
+            raise argparse.ArgumentTypeError(f"invalid value {value!r}: {e}")
+
+    return parse
+
+
+def add_matcher_arguments(parser):
+    for key, (description, matcher_type) in MATCHER_TYPES.items():
+        parse = matcher_argument(matcher_type)
+        parser.add_argument(f"-m{key}", dest=f"match_{key}", type=parse, help=f"Match {description}")
+        parser.add_argument(f"-f{key}", dest=f"filter_{key}", type=parse, help=f"Filter {description}")
+
+
+def matchers_from_args(args, extra_filters=(), default_matchers=()):
+    """default_matchers only apply when no -m* option was given."""
+    matchers, filters = [], list(extra_filters)
+    for key in MATCHER_TYPES:
+        if getattr(args, f"match_{key}", None):
+            matchers.append(getattr(args, f"match_{key}"))
+        if getattr(args, f"filter_{key}", None):
+            filters.append(getattr(args, f"filter_{key}"))
+    return MatcherSet(matchers or list(default_matchers), filters)
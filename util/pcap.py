@@ -0,0 +1,187 @@
+import socket
+import struct
+
+"""
+Streaming pcap / pcapng reader, no scapy needed.
+
+Packets are read one at a time from a buffered file, so memory stays flat
+however big the capture is, and only the headers needed to reach the TCP
+payload are decoded (scapy builds a full layer tree per packet, far slower on
+multi-GB captures).
+
+    for timestamp, linktype, frame in iter_pcap("capture.pcapng"):
+        segment = tcp_segment(linktype, frame)
+        if segment is not None:
+            src, sport, dst, dport, payload = segment
+
+Link types: Ethernet (802.1Q / QinQ tags), raw IP, BSD loopback, Linux
+cooked v1 and v2.
+"""
+
+PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+}
+PCAPNG_MAGIC = b"\x0a\x0d\x0d\x0a"
+
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = (12, 14, 101)
+LINKTYPE_LOOP = 108
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+IPV6_EXTENSIONS = (0, 43, 60)  # hop-by-hop, routing, destination options
+TCP = 6
+
+IPV4_HEADER = struct.Struct(">BxHxxHxB")  # version/ihl, total length, flags/fragment, protocol
+IPV6_HEADER = struct.Struct(">4xHB")  # payload length, next header
+PORTS = struct.Struct(">HH")
+ETHERTYPE = struct.Struct(">H")
+
+
+class PcapError(Exception):
+    pass
+
+
+def iter_pcap(path, buffer_size=1 << 20):
+    """Yields (timestamp, linktype, frame bytes) for every packet in a pcap or pcapng file."""
+    with open(path, "rb", buffering=buffer_size) as f:
+        magic = f.read(4)
+        if magic == PCAPNG_MAGIC:
+            yield from _iter_pcapng(f)
+        elif magic in PCAP_MAGIC:
+            yield from _iter_pcap(f, *PCAP_MAGIC[magic])
+        else:
+            raise PcapError(f"{path}: not a pcap or pcapng file")
+
+
+def _iter_pcap(f, order, resolution):
+    header = f.read(20)
+    if len(header) < 20:
+        raise PcapError("truncated pcap header")
+    linktype = struct.unpack(order + "I", header[16:20])[0] & 0xFFFF
+    record = struct.Struct(order + "IIII")
+    while True:
+        head = f.read(16)
+        if len(head) < 16:
+            return
+        seconds, fraction, captured, _ = record.unpack(head)
+        frame = f.read(captured)
+        if len(frame) < captured:
+            return  # capture cut off mid-packet
+        yield seconds + fraction * resolution, linktype, frame
+
+
+def _iter_pcapng(f):
+    order = "<"
+    interfaces = []
+    head = PCAPNG_MAGIC + f.read(4)
+    while len(head) == 8:
+        if head[:4] == PCAPNG_MAGIC:
+            # section header, sets the byte order of every block after it
+            order = "<" if f.read(4) == b"\x4d\x3c\x2b\x1a" else ">"
+            length = struct.unpack(order + "I", head[4:])[0]
+            f.read(length - 12)
+            interfaces = []
+        else:
+            block_type, length = struct.unpack(order + "II", head)
+            body = f.read(length - 8)
+            if len(body) < length - 8:
+                return
+            if block_type == 1:  # interface description
+                linktype = struct.unpack_from(order + "H", body)[0]
+                interfaces.append((linktype, _resolution(body[8:-4], order)))
+            elif block_type == 6:  # enhanced packet
+                interface, high, low, captured = struct.unpack_from(order + "IIII", body)
+                linktype, resolution = interfaces[interface]
+                yield ((high << 32) | low) * resolution, linktype, body[20:20 + captured]
+            elif block_type == 3:  # simple packet, no timestamp
+                captured = min(struct.unpack_from(order + "I", body)[0], len(body) - 8)
+                yield 0.0, interfaces[0][0], body[4:4 + captured]
+        head = f.read(8)
+
+
+def _resolution(options, order):
+    """if_tsresol option of an interface description block, microseconds by default."""
+    offset = 0
+    while offset + 4 <= len(options):
+        code, length = struct.unpack_from(order + "HH", options, offset)
+        if code == 0:
+            break
+        if code == 9 and length >= 1:
+            value = options[offset + 4]
+            return 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+        offset += 4 + (length + 3) // 4 * 4
+    return 1e-6
+
+
+def _network_layer(linktype, frame):
+    """(ethertype, offset of the IP header) or None."""
+    if linktype == LINKTYPE_ETHERNET:
+        offset = 12
+        ethertype = ETHERTYPE.unpack_from(frame, offset)[0]
+        while ethertype in ETHERTYPE_VLAN:
+            offset += 4
+            ethertype = ETHERTYPE.unpack_from(frame, offset)[0]
+        return ethertype, offset + 2
+    if linktype in LINKTYPE_RAW:
+        version = frame[0] >> 4 if frame else 0
+        return (ETHERTYPE_IPV4 if version == 4 else ETHERTYPE_IPV6), 0
+    if linktype in (LINKTYPE_NULL, LINKTYPE_LOOP):
+        # address family in host byte order, 2 is AF_INET, the IPv6 value differs per OS
+        family = frame[0] or frame[3]
+        return (ETHERTYPE_IPV4 if family == 2 else ETHERTYPE_IPV6), 4
+    if linktype == LINKTYPE_LINUX_SLL:
+        return ETHERTYPE.unpack_from(frame, 14)[0], 16
+    if linktype == LINKTYPE_LINUX_SLL2:
+        return ETHERTYPE.unpack_from(frame, 0)[0], 20
+    return None
+
+
+def tcp_segment(linktype, frame):
+    """(src, sport, dst, dport, payload bytes) for TCP over IPv4/IPv6, else None."""
+    if len(frame) < 40:
+        return None  # too short to hold an IP and a TCP header
+    network = _network_layer(linktype, frame)
+    if network is None:
+        return None
+    ethertype, offset = network
+    if ethertype == ETHERTYPE_IPV4:
+        if len(frame) < offset + 20:
+            return None
+        version_ihl, total_length, fragment, protocol = IPV4_HEADER.unpack_from(frame, offset)
+        if protocol != TCP or fragment & 0x1FFF:
+            return None
+        src = socket.inet_ntop(socket.AF_INET, frame[offset + 12:offset + 16])
+        dst = socket.inet_ntop(socket.AF_INET, frame[offset + 16:offset + 20])
+        end = offset + total_length if total_length else len(frame)
+        offset += (version_ihl & 0x0F) * 4
+    elif ethertype == ETHERTYPE_IPV6:
+        if len(frame) < offset + 40:
+            return None
+        payload_length, next_header = IPV6_HEADER.unpack_from(frame, offset)
+        src = socket.inet_ntop(socket.AF_INET6, frame[offset + 8:offset + 24])
+        dst = socket.inet_ntop(socket.AF_INET6, frame[offset + 24:offset + 40])
+        end = offset + 40 + payload_length if payload_length else len(frame)
+        offset += 40
+        while next_header in IPV6_EXTENSIONS and offset + 2 <= len(frame):
+            next_header, length = frame[offset], frame[offset + 1]
+            offset += (length + 1) * 8
+        if next_header != TCP:
+            return None
+    else:
+        return None
+
+    if len(frame) < offset + 20:
+        return None
+    sport, dport = PORTS.unpack_from(frame, offset)
+    data_offset = (frame[offset + 12] >> 4) * 4
+    # Ethernet pads short frames, the IP length says where the segment ends
+    return src, sport, dst, dport, frame[offset + data_offset:min(end, len(frame))]
@@ -0,0 +1,63 @@
+import json
+import urllib.parse
+
+"""
+Pre-encoded request bodies for FUZZ style payload templates.
+
+The static part of the body (think multi-KB __VIEWSTATE blobs) is encoded once.
+Rendering a candidate only encodes the candidate itself and joins it into the
+precomputed FUZZ slots.
+
+>>> template = RequestTemplate({"user": "admin", "pass": "FUZZ"}, "application/x-www-form-urlencoded")
+>>> template.render("p@ss word")
+b'user=admin&pass=p%40ss+word'
+"""
+
+MARKER = "FUZZ"
+
+
+class RequestTemplate:
+    def __init__(self, payload_template, content_type):
+        self.is_json = "json" in (content_type or "")
+        if self.is_json:
+            self.parts = self._compile_json(payload_template)
+        else:
+            self.parts = self._compile_form(payload_template)
+
+    @staticmethod
+    def _compile_form(payload_template):
+        # same encoding aiohttp applies to a dict passed as data=
+        parts, current = [], []
+        for key, value in payload_template.items():
+            if current:
+                current.append("&")
+            current.append(urllib.parse.quote_plus(key) + "=")
+            chunks = value.split(MARKER)
+            current.append(urllib.parse.quote_plus(chunks[0]))
+            for chunk in chunks[1:]:
+                parts.append("".join(current).encode())
+                current = [urllib.parse.quote_plus(chunk)]
+        parts.append("".join(current).encode())
+        return parts
+
+    @staticmethod
+    def _compile_json(payload_template):
+        # a private-use sentinel comes out of json.dumps as a fixed \u escape,
+        # so the dumped body can be split on it
+        sentinel = "\ue000"
+        payload = {
+            key: value.replace(MARKER, sentinel) if isinstance(value, str) else value
+            for key, value in payload_template.items()
+        }
+        escaped = json.dumps(sentinel)[1:-1]
+        return [part.encode() for part in json.dumps(payload).split(escaped)]
+
+    def encode_candidate(self, candidate):
+        if self.is_json:
+            return json.dumps(candidate)[1:-1].encode()
+        return urllib.parse.quote_plus(candidate).encode()
+
+    def render(self, candidate):
+        if len(self.parts) == 1:
+            return self.parts[0]
+        return self.encode_candidate(candidate).join(self.parts)
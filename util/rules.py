@@ -0,0 +1,203 @@
+import os
+
+"""
+Hashcat-style rule engine, applied lazily to a base wordlist.
+
+Every word is run through every rule as it is read, so mutated candidates are
+never written to disk and memory stays flat however many rules there are.
+
+    rules = load_rules("best64.rule")
+    for offset, candidate in apply_rules(iter_wordlist("rockyou.txt"), rules):
+        ...
+
+Rules file: one rule per line, functions applied left to right, spaces
+between functions are ignored, lines starting with # are comments.
+
+    :       nothing                     l / u / c / C   lower / upper / Capitalize / cAPITALIZE
+    t / TN  toggle all / toggle at N    r / d / f       reverse / duplicate / reflect
+    pN      append word N times         { / }           rotate left / right
+    $X / ^X append / prepend X          [ / ]           delete first / last
+    DN      delete at N                 xNM / ONM       extract / omit M from N
+    iNX     insert X at N               oNX             overwrite at N with X
+    'N      truncate at N               sXY / @X        replace X with Y / purge X
+    zN / ZN duplicate first / last N    q / E           duplicate every char / Title Case
+    k / K   swap first two / last two   *NM             swap at N and M
+    +N / -N increment / decrement at N  <N / >N         keep if length < N / > N
+    !X / /X reject if contains / unless contains X
+
+Positions N/M are 0-9 then A-Z for 10-35, as in hashcat.
+"""
+
+
+class RuleError(ValueError):
+    pass
+
+
+def _position(char):
+    if char.isdigit():
+        return int(char)
+    if "A" <= char <= "Z":
+        return ord(char) - ord("A") + 10
+    raise RuleError(f"invalid position {char!r}")
+
+
+def _toggle(char):
+    return char.lower() if char.isupper() else char.upper()
+
+
+def _toggle_at(word, n):
+    if n >= len(word):
+        return word
+    return word[:n] + _toggle(word[n]) + word[n + 1 :]
+
+
+def _delete_at(word, n):
+    return word[:n] + word[n + 1 :] if n < len(word) else word
+
+
+def _extract(word, n, m):
+    return word[n : n + m] if n < len(word) else word
+
+
+def _omit(word, n, m):
+    return word[:n] + word[n + m :] if n < len(word) else word
+
+
+def _insert(word, n, char):
+    return word[:n] + char + word[n:] if n <= len(word) else word
+
+
+def _overwrite(word, n, char):
+    return word[:n] + char + word[n + 1 :] if n < len(word) else word
+
+
+def _swap(word, n, m):
+    if n >= len(word) or m >= len(word):
+        return word
+    chars = list(word)
+    chars[n], chars[m] = chars[m], chars[n]
+    return "".join(chars)
+
+
+def _shift_at(word, n, delta):
+    if n >= len(word):
+        return word
+    return word[:n] + chr((ord(word[n]) + delta) % 256) + word[n + 1 :]
+
+
+def _title(word):
+    return " ".join(part.capitalize() for part in word.lower().split(" "))
+
+
+# name -> (argument spec, function). "N" is a position, "X" a literal character.
+# A function returning None rejects the candidate.
+FUNCTIONS = {
+    ":": ("", lambda w: w),
+    "l": ("", lambda w: w.lower()),
+    "u": ("", lambda w: w.upper()),
+    "c": ("", lambda w: w.capitalize()),
+    "C": ("", lambda w: w[:1].lower() + w[1:].upper()),
+    "t": ("", lambda w: w.swapcase()),
+    "T": ("N", _toggle_at),
+    "r": ("", lambda w: w[::-1]),
+    "d": ("", lambda w: w + w),
+    "p": ("N", lambda w, n: w * (n + 1)),
+    "f": ("", lambda w: w + w[::-1]),
+    "{": ("", lambda w: w[1:] + w[:1]),
+    "}": ("", lambda w: w[-1:] + w[:-1]),
+    "$": ("X", lambda w, x: w + x),
+    "^": ("X", lambda w, x: x + w),
+    "[": ("", lambda w: w[1:]),
+    "]": ("", lambda w: w[:-1]),
+    "D": ("N", _delete_at),
+    "x": ("NN", _extract),
+    "O": ("NN", _omit),
+    "i": ("NX", _insert),
+    "o": ("NX", _overwrite),
+    "'": ("N", lambda w, n: w[:n]),
+    "s": ("XX", lambda w, x, y: w.replace(x, y)),
+    "@": ("X", lambda w, x: w.replace(x, "")),
+    "z": ("N", lambda w, n: w[:1] * n + w),
+    "Z": ("N", lambda w, n: w + w[-1:] * n),
+    "q": ("", lambda w: "".join(c + c for c in w)),
+    "E": ("", _title),
+    "k": ("", lambda w: w[1:2] + w[:1] + w[2:]),
+    "K": ("", lambda w: w[:-2] + w[-1:] + w[-2:-1] if len(w) >= 2 else w),
+    "*": ("NN", _swap),
+    "+": ("N", lambda w, n: _shift_at(w, n, 1)),
+    "-": ("N", lambda w, n: _shift_at(w, n, -1)),
+    "<": ("N", lambda w, n: w if len(w) < n else None),
+    ">": ("N", lambda w, n: w if len(w) > n else None),
+    "!": ("X", lambda w, x: None if x in w else w),
+    "/": ("X", lambda w, x: w if x in w else None),
+}
+
+
+def parse_rule(line):
+    """'c $1 $2' -> [(function, args), ...]"""
+    steps = []
+    i = 0
+    while i < len(line):
+        name = line[i]
+        i += 1
+        if name == " ":
+            continue
+        if name not in FUNCTIONS:
+            raise RuleError(f"unknown rule function {name!r}")
+        spec, function = FUNCTIONS[name]
+        if i + len(spec) > len(line):
+            raise RuleError(f"{name!r} needs {len(spec)} argument(s)")
+        args = [
+            _position(char) if kind == "N" else char
+            for kind, char in zip(spec, line[i : i + len(spec)])
+        ]
+        i += len(spec)
+        steps.append((function, args))
+    return steps
+
+
+def load_rules(file_path):
+    """Parses a rules file, a bad line raises RuleError with its line number."""
+    rules = []
+    with open(os.path.expanduser(file_path), "r", encoding="latin-1") as file:
+        for number, line in enumerate(file, start=1):
+            line = line.rstrip("\r\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            try:
+                rules.append(parse_rule(line))
+            except RuleError as e:
+                raise RuleError(f"{file_path}:{number}: {e}") from None
+    return rules
+
+
+def apply_rule(word, rule):
+    for function, args in rule:
+        word = function(word, *args)
+        if word is None:
+            return None
+    return word
+
+
+def mutate(word, rules):
+    """Unique candidates for one word, in rule order."""
+    seen = set()
+    for rule in rules:
+        candidate = apply_rule(word, rule)
+        if candidate and candidate not in seen:
+            seen.add(candidate)
+            yield candidate
+
+
+def apply_rules(words, rules):
+    """
+    (offset, word) pairs in, (offset, candidate) pairs out. The offset of the
+    base word is kept so checkpoints stay valid. No rules means the words
+    pass through untouched.
+    """
+    if not rules:
+        yield from words
+        return
+    for offset, word in words:
+        for candidate in mutate(word, rules):
+            yield offset, candidate
@@ -0,0 +1,241 @@
+import argparse
+import fnmatch
+import ipaddress
+import re
+import urllib.parse
+
+"""
+Scope allowlist and exclusions for crawlers, scanners and credential testers.
+
+    --scope example.com --scope "*.example.com" --scope 10.10.0.0/16
+    --exclude http://example.com/logout.php --exclude "dev-*.example.com"
+    --scope-path "^/app/" --exclude-path "logout|signout"
+
+A rule is a host, a host glob, a CIDR range or (for --exclude) a full URL.
+Hosts are compared exactly, so example.com does not let in
+example.com.evil.net. Everything is compiled once:
+
+    exact hosts      set lookup
+    *.suffix globs   set lookup per label of the host
+    other globs      one combined regex
+    CIDR ranges      binary prefix trie, at most 32 / 128 steps
+    paths            one combined regex per list
+    excluded URLs    set lookup, query string ignored
+
+CIDR rules only match hosts given as IP addresses, names are not resolved.
+"""
+
+URL_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+class PrefixTrie:
+    """Binary trie of network prefixes, a lookup walks the address bits until a prefix ends."""
+
+    def __init__(self, bits):
+        self.bits = bits
+        self.root = [None, None, False]  # child for bit 0, child for bit 1, prefix ends here
+
+    def add(self, network):
+        node = self.root
+        value = int(network.network_address)
+        for i in range(network.prefixlen):
+            if node[2]:
+                return  # a shorter prefix already covers it
+            bit = (value >> (self.bits - 1 - i)) & 1
+            if node[bit] is None:
+                node[bit] = [None, None, False]
+            node = node[bit]
+        node[:] = [None, None, True]
+
+    def __contains__(self, address):
+        node = self.root
+        value = int(address)
+        for i in range(self.bits):
+            if node[2]:
+                return True
+            node = node[(value >> (self.bits - 1 - i)) & 1]
+            if node is None:
+                return False
+        return node[2]
+
+
+def parse_rule(value):
+    """
+    'http://a.com/logout' -> ("url", ...), '10.0.0.0/8' -> ("cidr", network),
+    '*.a.com' -> ("glob", '*.a.com'), 'a.com' -> ("host", 'a.com')
+    """
+    value = value.strip()
+    if not value:
+        raise argparse.ArgumentTypeError("empty scope rule")
+    if "://" in value:
+        return "url", normalize_url(value)
+    try:
+        return "cidr", ipaddress.ip_network(value, strict=False)
+    except ValueError:
+        pass
+    host = normalize_host(value)
+    if any(char in host for char in "*?["):
+        return "glob", host
+    return "host", host
+
+
+def parse_path(value):
+    try:
+        return re.compile(value)
+    except re.error as e:
+        raise argparse.ArgumentTypeError(f"bad path regex {value!r}: {e}")
+
+
+def normalize_host(host):
+    return host.strip().lower().strip("[]").rstrip(".")
+
+
+def normalize_url(url):
+    """scheme://host[:port]/path, lowercased host, default port, query and fragment dropped."""
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = normalize_host(parts.hostname or "")
+    if ":" in host:
+        host = f"[{host}]"
+    if parts.port and parts.port != URL_DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    return f"{scheme}://{host}{parts.path or '/'}"
+
+
+def _combine(patterns):
+    patterns = [p.pattern if hasattr(p, "pattern") else p for p in patterns]
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+
+class HostSet:
+    def __init__(self, rules=()):
+        self.hosts = set()
+        self.suffixes = set()
+        self.networks = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+        self.has_networks = False
+        globs = []
+        for kind, value in rules:
+            if kind == "host":
+                self.hosts.add(value)
+            elif kind == "cidr":
+                self.networks[value.version].add(value)
+                self.has_networks = True
+            elif value.startswith("*.") and not any(char in value[2:] for char in "*?["):
+                self.suffixes.add(value[2:])
+            else:
+                globs.append(fnmatch.translate(value))
+        self.globs = _combine(globs)
+
+    def __bool__(self):
+        return bool(self.hosts or self.suffixes or self.has_networks or self.globs)
+
+    def matches(self, host):
+        if host in self.hosts:
+            return True
+        if self.has_networks:
+            try:
+                address = ipaddress.ip_address(host)
+            except ValueError:
+                pass
+            else:
+                return address in self.networks[address.version]
+        if self.suffixes:
+            dot = host.find(".")
+            while dot != -1:
+                if host[dot + 1:] in self.suffixes:
+                    return True
+                dot = host.find(".", dot + 1)
+        return self.globs is not None and self.globs.match(host) is not None
+
+
+class Scope:
+    """
+    `include` / `exclude` are rule strings or parse_rule() tuples. With no
+    include rules every host is in scope, exclusions always win.
+    """
+
+    def __init__(self, include=(), exclude=(), include_paths=(), exclude_paths=()):
+        include = [parse_rule(r) if isinstance(r, str) else r for r in include]
+        exclude = [parse_rule(r) if isinstance(r, str) else r for r in exclude]
+        # a URL given as scope means its host
+        include = [
+            ("host", normalize_host(urllib.parse.urlsplit(value).hostname or ""))
+            if kind == "url" else (kind, value)
+            for kind, value in include
+        ]
+        self.include = HostSet(include)
+        self.exclude = HostSet(rule for rule in exclude if rule[0] != "url")
+        self.excluded_urls = {value for kind, value in exclude if kind == "url"}
+        self.include_paths = _combine(include_paths)
+        self.exclude_paths = _combine(exclude_paths)
+        self.hosts = {}  # host -> verdict, the same few hosts are asked about over and over
+
+    def excludes_host(self, host):
+        return self.exclude.matches(normalize_host(host))
+
+    def allows_host(self, host):
+        host = normalize_host(host)
+        allowed = self.hosts.get(host)
+        if allowed is None:
+            allowed = not self.exclude.matches(host) and (
+                not self.include or self.include.matches(host)
+            )
+            if len(self.hosts) >= 4096:
+                self.hosts.clear()
+            self.hosts[host] = allowed
+        return allowed
+
+    def allows(self, url):
+        parts = urllib.parse.urlsplit(url)
+        if not parts.hostname or not self.allows_host(parts.hostname):
+            return False
+        if self.excluded_urls and normalize_url(url) in self.excluded_urls:
+            return False
+        if self.include_paths is None and self.exclude_paths is None:
+            return True
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        if self.exclude_paths is not None and self.exclude_paths.search(path):
+            return False
+        return self.include_paths is None or self.include_paths.search(path) is not None
+
+    def __contains__(self, url):
+        return self.allows(url)
+
+
+def add_scope_arguments(parser):
+    group = parser.add_argument_group("scope")
+    group.add_argument(
+        "--scope",
+        action="append",
+        type=parse_rule,
+        default=[],
+        help="Only touch this host, *.glob or CIDR, repeatable (default: the target host)",
+    )
+    group.add_argument(
+        "--exclude",
+        action="append",
+        type=parse_rule,
+        default=[],
+        help="Never touch this host, glob, CIDR or full URL (e.g. a logout link), repeatable",
+    )
+    group.add_argument(
+        "--scope-path", action="append", type=parse_path, default=[], help="Only request paths matching this regex"
+    )
+    group.add_argument(
+        "--exclude-path", action="append", type=parse_path, default=[], help="Never request paths matching this regex"
+    )
+
+
+def scope_from_args(args, default=(), exclude=()):
+    """`default` include rules apply when no --scope was given, `exclude` is added to --exclude."""
+    include = args.scope or [parse_rule(rule) for rule in default]
+    return Scope(
+        include,
+        list(args.exclude) + [parse_rule(rule) for rule in exclude],
+        args.scope_path,
+        args.exclude_path,
+    )
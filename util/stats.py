@@ -0,0 +1,71 @@
+import random
+import time
+
+"""
+Small run statistics helpers shared by the bruteforce tools.
+"""
+
+
+class Throughput:
+    """Counts completed requests and reports the rate since the first one."""
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.count = 0
+        self.last_tick = (self.start_time, 0)
+
+    def add(self, n=1):
+        self.count += n
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.start_time
+
+    @property
+    def rate(self):
+        elapsed = self.elapsed
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return f"{self.count} requests in {self.elapsed:.2f}s ({self.rate:.1f} req/s)"
+
+    def tick(self):
+        """Rate since the previous tick, for per-second progress lines."""
+        now = time.monotonic()
+        last_time, last_count = self.last_tick
+        self.last_tick = (now, self.count)
+        elapsed = now - last_time
+        return (self.count - last_count) / elapsed if elapsed > 0 else 0.0
+
+
+class Latency:
+    """
+    Latency percentiles over a fixed-size reservoir sample, so memory stays
+    the same whether a run makes a thousand attempts or a hundred million.
+    """
+
+    def __init__(self, size=10000):
+        self.size = size
+        self.samples = []
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.max = max(self.max, seconds)
+        if len(self.samples) < self.size:
+            self.samples.append(seconds)
+        else:
+            slot = random.randrange(self.count)
+            if slot < self.size:
+                self.samples[slot] = seconds
+
+    def percentile(self, p):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)]
+
+    def summary(self):
+        p50, p95, p99 = (self.percentile(p) * 1000 for p in (50, 95, 99))
+        return f"p50 {p50:.0f}ms p95 {p95:.0f}ms p99 {p99:.0f}ms max {self.max * 1000:.0f}ms"
@@ -0,0 +1,51 @@
+import mmap
+import os
+
+"""
+Lazy, mmap-backed wordlist reader.
+
+The file is never loaded into memory: lines are sliced out of the mapping one
+at a time, so memory stays flat whether the list is 1 KB or rockyou-sized.
+
+>>> for offset, word in iter_wordlist("~/wordlists/rockyou.txt", start_offset=1024):
+...     print(offset, word)
+"""
+
+
+def _align_to_line(mapped, offset):
+    # a start offset in the middle of a line belongs to that line's owner,
+    # jump to the start of the next line instead
+    if offset <= 0:
+        return 0
+    if mapped[offset - 1 : offset] == b"\n":
+        return offset
+    newline = mapped.find(b"\n", offset)
+    return len(mapped) if newline == -1 else newline + 1
+
+
+def iter_wordlist(file_path, start_offset=0, end_offset=None, encoding="latin-1"):
+    """
+    Yields (byte offset, word) for every line that starts inside
+    [start_offset, end_offset). Offsets that land mid-line are moved to the
+    next line, so adjacent byte ranges never overlap or drop a line.
+    """
+    expanded_path = os.path.expanduser(file_path)
+    with open(expanded_path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            end = size if end_offset is None else min(end_offset, size)
+            offset = _align_to_line(mapped, start_offset)
+
+            while offset < end:
+                newline = mapped.find(b"\n", offset)
+                line_end = size if newline == -1 else newline
+                yield offset, mapped[offset:line_end].decode(encoding).strip()
+                offset = line_end + 1
+
+
+def read_wordlist(file_path, start_offset=0, end_offset=None):
+    """Yields just the words, for callers that don't care about offsets."""
+    for _, word in iter_wordlist(file_path, start_offset, end_offset):
+        yield word
@@ -0,0 +1,224 @@
+import argparse
+import array
+import bisect
+import mmap
+import os
+import struct
+import sys
+
+"""
+Line-offset index for wordlists: O(1) access to line N without scanning.
+
+<wordlist>.idx holds a small header followed by one little-endian uint64 per
+line, the byte offset where that line starts. The index is mmapped and read
+through a memoryview, so opening it costs nothing however long the list is.
+
+    python3 util/wordlist_index.py ~/wordlists/rockyou.txt     # build once
+
+Testers take --shard i/N (0-based, i < N) or --range a:b (line numbers, b
+exclusive, either side optional) and turn it into a byte range for
+iter_wordlist:
+
+    --shard 0/4 on one box, --shard 1/4 on the next ...
+    --range 1000000:2000000
+"""
+
+MAGIC = b"WLIDX1\0\0"
+# magic, wordlist size, wordlist mtime_ns, line count
+HEADER = struct.Struct("<8sQQQ")
+BATCH = 1 << 20
+
+
+class WordlistIndexError(ValueError):
+    pass
+
+
+def index_path(wordlist):
+    return os.path.expanduser(wordlist) + ".idx"
+
+
+def build_index(wordlist, path=None):
+    """Writes the index next to the wordlist (or to `path`), returns the line count."""
+    wordlist = os.path.expanduser(wordlist)
+    path = path or index_path(wordlist)
+    stat = os.stat(wordlist)
+    count = 0
+    with open(wordlist, "rb") as file, open(path + ".tmp", "wb") as out:
+        out.write(HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, 0))
+        if stat.st_size:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                offsets = array.array("Q")
+                offset = 0
+                while offset < stat.st_size:
+                    offsets.append(offset)
+                    if len(offsets) == BATCH:
+                        _write_offsets(out, offsets)
+                        count += len(offsets)
+                        offsets = array.array("Q")
+                    newline = mapped.find(b"\n", offset)
+                    if newline == -1:
+                        break
+                    offset = newline + 1
+                _write_offsets(out, offsets)
+                count += len(offsets)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, stat.st_size, stat.st_mtime_ns, count))
+    os.replace(path + ".tmp", path)
+    return count
+
+
+def _write_offsets(out, offsets):
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    offsets.tofile(out)
+
+
+class WordlistIndex:
+    """
+    >>> index = WordlistIndex.open("rockyou.txt")
+    >>> len(index), index[1000], index.word(1000)
+    """
+
+    def __init__(self, wordlist, path=None):
+        self.wordlist = os.path.expanduser(wordlist)
+        self.path = path or index_path(self.wordlist)
+        with open(self.path, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise WordlistIndexError(f"{self.path} is truncated")
+            magic, self.size, mtime_ns, self.count = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise WordlistIndexError(f"{self.path} is not a wordlist index")
+            stat = os.stat(self.wordlist)
+            if (stat.st_size, stat.st_mtime_ns) != (self.size, mtime_ns):
+                raise WordlistIndexError(f"{self.path} is stale, {self.wordlist} changed")
+            self.mapped = self.view = None
+            self.offsets = []
+            if self.count:
+                self.mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.view = memoryview(self.mapped)[HEADER.size : HEADER.size + self.count * 8]
+                if sys.byteorder == "little":
+                    self.offsets = self.view.cast("Q")
+                else:
+                    self.offsets = array.array("Q", bytes(self.view))
+                    self.offsets.byteswap()
+
+    @classmethod
+    def open(cls, wordlist, build=True):
+        """Loads the index, (re)building it first when missing or stale."""
+        try:
+            return cls(wordlist)
+        except (OSError, WordlistIndexError):
+            if not build:
+                raise
+        print(f"[+] Indexing {wordlist} ...")
+        build_index(wordlist)
+        return cls(wordlist)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, line):
+        """Byte offset of `line`, len(index) maps to the end of the file."""
+        if line == self.count:
+            return self.size
+        return self.offsets[line]
+
+    def line_of(self, offset):
+        """Line that contains byte `offset`, e.g. to turn a checkpoint back into an index."""
+        return max(bisect.bisect_right(self.offsets, offset) - 1, 0)
+
+    def byte_range(self, start_line, end_line):
+        start_line = min(max(start_line, 0), self.count)
+        end_line = min(max(end_line, start_line), self.count)
+        return self[start_line], self[end_line]
+
+    def word(self, line, encoding="latin-1"):
+        start, end = self[line], self[line + 1]
+        with open(self.wordlist, "rb") as file:
+            file.seek(start)
+            return file.read(end - start).decode(encoding).strip()
+
+    def close(self):
+        if self.mapped is not None:
+            # views into the mapping have to go before it can be closed
+            if isinstance(self.offsets, memoryview):
+                self.offsets.release()
+            self.view.release()
+            self.mapped.close()
+            self.mapped = self.view = None
+            self.offsets = []
+
+
+def parse_shard(value):
+    """'2/8' -> (2, 8)"""
+    try:
+        shard, total = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N, got {value!r}")
+    if total < 1 or not 0 <= shard < total:
+        raise argparse.ArgumentTypeError(f"shard must satisfy 0 <= i < N, got {value!r}")
+    return shard, total
+
+
+def parse_range(value):
+    """'100:200' -> (100, 200), '100:' -> (100, None), ':200' -> (0, 200)"""
+    try:
+        start, end = value.split(":")
+        return int(start or 0), int(end) if end else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a:b, got {value!r}")
+
+
+def shard_lines(count, shard, total):
+    return count * shard // total, count * (shard + 1) // total
+
+
+def add_slice_arguments(parser):
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        "--shard", type=parse_shard, help="Only test slice i of N (0-based), e.g. 0/4"
+    )
+    group.add_argument(
+        "--range", type=parse_range, help="Only test wordlist lines a to b (b exclusive), e.g. 0:1000"
+    )
+
+
+def slice_from_args(args, wordlist):
+    """(start byte offset, end byte offset or None) for the --shard / --range given."""
+    if not args.shard and not args.range:
+        return 0, None
+    index = WordlistIndex.open(wordlist)
+    try:
+        if args.shard:
+            start_line, end_line = shard_lines(len(index), *args.shard)
+        else:
+            start_line, end_line = args.range
+            end_line = len(index) if end_line is None else end_line
+        start, end = index.byte_range(start_line, end_line)
+        print(f"[+] Lines {start_line}:{end_line} of {len(index)} -> bytes {start}:{end}")
+        return start, end
+    finally:
+        index.close()
+
+
+def count_lines(wordlist, start=0, end=None, build=True):
+    """
+    Lines starting between byte offsets `start` and `end`, read off the index.
+    A missing or stale index is built first, or raises with build=False.
+    """
+    index = WordlistIndex.open(wordlist, build=build)
+    try:
+        end_line = len(index) if end is None else bisect.bisect_left(index.offsets, end)
+        return end_line - bisect.bisect_left(index.offsets, start)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a line-offset index for a wordlist")
+    parser.add_argument("wordlist", nargs="+", help="Wordlist file(s)")
+    args = parser.parse_args()
+    for wordlist in args.wordlist:
+        count = build_index(wordlist)
+        print(f"[+] {index_path(wordlist)}: {count} lines")
@@ -1,28 +1,159 @@
+import argparse
+import asyncio
+import os
+import sys
 
-import requests
+import aiohttp
 
-def request(url):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.dns_resolver import DNSError, PoolResolver, ResolverPool
+from util.http_session import create_session
+from util.scope import add_scope_arguments, scope_from_args
+from util.stats import Throughput
+from util.wordlist import read_wordlist
+
+"""
+Async subdomain discovery, resolve first, then probe over HTTP
+
+python3 web-penetration/domain-crawler.py -d example.com
+python3 web-penetration/domain-crawler.py -d example.com -r 1.1.1.1 -r 8.8.8.8 -t 200
+python3 web-penetration/domain-crawler.py -d example.test -r 127.0.0.1:5353   # local stub server
+python3 web-penetration/domain-crawler.py -d example.com --scope 10.10.0.0/16 --exclude "vpn.example.com"
+
+Names are always resolved (that only talks to the resolvers), a name is probed
+over HTTP when it or one of its addresses is in scope.
+
+pip3 install aiohttp
+"""
+
+DEFAULT_WORDLIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "subdomains.txt")
+# "https://raw.githubusercontent.com/codeandrew/SecLists/master/Miscellaneous/subdomain-list.txt"
+
+
+def in_scope(scope, name, addresses):
+    if scope.allows_host(name):
+        return True
+    if scope.excludes_host(name):
+        return False
+    return any(scope.allows_host(address) for address in addresses)
+
+
+async def resolve_worker(names, probes, pool, wildcard, stats, output, scope):
+    while True:
+        name = await names.get()
+        if name is None:
+            return
+        try:
+            records = await pool.resolve(name)
+        except DNSError as e:
+            print(f"[-] Skipping {e}")
+            continue
+        stats.add()
+        if not records:
+            continue
+
+        addresses = set(records["A"] + records["AAAA"])
+        if wildcard and addresses <= wildcard:
+            continue  # same answer as a random label, wildcard DNS
+
+        print(f"[+] Resolved {name} -> {', '.join(sorted(addresses))}")
+        output.write(f"{name}\t{','.join(sorted(addresses))}\n")
+        output.flush()
+        if probes is not None:
+            if in_scope(scope, name, addresses):
+                await probes.put(name)
+            else:
+                print(f"[-] {name} is out of scope, not probing")
+
+
+async def probe_worker(probes, session, timeout):
+    while True:
+        name = await probes.get()
+        if name is None:
+            return
+        url = f"http://{name}"
+        try:
+            async with session.get(url, allow_redirects=False, timeout=timeout) as response:
+                print(f"[+] Discovered subdomain --> {url} [{response.status}]")
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"[-] {url} resolves but HTTP failed: {e.__class__.__name__}")
+
+
+async def discover(args, output, scope):
+    pool = ResolverPool(args.resolver, timeout=args.dns_timeout)
+    stats = Throughput()
     try:
-        return requests.get("http://{}".format(url))
-    except requests.exceptions.ConnectionError:
-        pass
+        wildcard = await pool.wildcard_addresses(args.domain)
+        if wildcard:
+            print(f"[!] Wildcard DNS detected, ignoring answers {sorted(wildcard)}")
+
+        names = asyncio.Queue(maxsize=args.concurrency * 2)
+        probes = None if args.no_http else asyncio.Queue(maxsize=args.http_concurrency * 2)
+        resolvers = [
+            asyncio.create_task(resolve_worker(names, probes, pool, wildcard, stats, output, scope))
+            for _ in range(args.concurrency)
+        ]
+
+        # probes reuse the answers above instead of asking the system resolver
+        session, _ = create_session(args.http_concurrency, resolver=PoolResolver(pool))
+        async with session:
+            probers = []
+            if probes is not None:
+                timeout = aiohttp.ClientTimeout(total=args.http_timeout)
+                probers = [
+                    asyncio.create_task(probe_worker(probes, session, timeout))
+                    for _ in range(args.http_concurrency)
+                ]
+            try:
+                seen = set()
+                for label in read_wordlist(args.wordlist):
+                    name = f"{label}.{args.domain}".lower()
+                    if label and name not in seen:
+                        seen.add(name)
+                        await names.put(name)
+                for _ in resolvers:
+                    await names.put(None)
+                await asyncio.gather(*resolvers)
+                for _ in probers:
+                    await probes.put(None)
+                await asyncio.gather(*probers)
+            finally:
+                for task in resolvers + probers:
+                    task.cancel()
+    finally:
+        pool.close()
+
+    print(f"[+] {stats.summary()}")
+    print(f"[+] dns: {pool.queries} queries, {pool.cache_hits} answered from cache")
 
-domain_list = "subdomains.txt" 
-#"https://raw.githubusercontent.com/codeandrew/SecLists/master/Miscellaneous/subdomain-list.txt"
-target_url = raw_input("Enter Target URL: \n")
 
-discovered_subdomain_list = []
+def main():
+    parser = argparse.ArgumentParser(description="Async subdomain discovery")
+    parser.add_argument("-d", "--domain", required=True, help="Target domain, e.g. example.com")
+    parser.add_argument("-w", "--wordlist", default=DEFAULT_WORDLIST, help="Subdomain wordlist")
+    parser.add_argument(
+        "-r",
+        "--resolver",
+        action="append",
+        help="Resolver ip[:port], repeat for a pool (default: /etc/resolv.conf)",
+    )
+    parser.add_argument("-t", "--concurrency", type=int, default=100, help="DNS lookups in flight")
+    parser.add_argument("--dns-timeout", type=float, default=2.0, help="Seconds per DNS query")
+    parser.add_argument("--http-concurrency", type=int, default=20, help="HTTP probes in flight")
+    parser.add_argument("--http-timeout", type=float, default=5.0, help="Seconds per HTTP probe")
+    parser.add_argument("--no-http", action="store_true", help="Only resolve, skip HTTP probing")
+    parser.add_argument("-o", "--output", help="Output file (default: <domain>-subdomains.txt)")
+    add_scope_arguments(parser)
+    args = parser.parse_args()
+    scope = scope_from_args(args, default=[args.domain, f"*.{args.domain}"])
 
-with open(domain_list, 'r') as wordlist_file:
-    for line in wordlist_file:
-        full_url = "{}.{}".format(line.strip(), target_url)
-        response = request(full_url)
-        if response:
-            print("[+] Discovered subdomain --> {}".format(full_url))
-            discovered_subdomain_list.append(full_url)
+    output_path = args.output or f"{args.domain}-subdomains.txt"
+    with open(output_path, "w") as output:
+        try:
+            asyncio.run(discover(args, output, scope))
+        except KeyboardInterrupt:
+            print("[-] Interrupted")
 
 
-with open("{}-subdomains.txt".format(target_url), 'w') as f:
-    for item in discovered_subdomain_list:
-        print >> f, item
-        
\ No newline at end of file
+if __name__ == "__main__":
+    main()
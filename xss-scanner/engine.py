@@ -0,0 +1,259 @@
+import os
+import re
+import sys
+import urllib.parse as urlparse
+
+import payloads
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from util.scope import Scope
+
+"""
+Sans-IO scanning core shared by scanner.py (requests) and async-scanner.py
+(httpx + asyncio).
+
+Nothing in here touches the network. Crawl state, form indexing, CSRF tokens
+and the payload tests live here, the front-ends only move bytes. A test is a
+generator that yields Request objects and gets the transport's response sent
+back (anything with a `.text`), its return value is the list of findings:
+
+    findings = drive(link_test(url), session_send)            # sync
+    findings = await adrive(form_test(form, url), client_send)  # async
+"""
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/78.0.3904.97 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15; rv:70.0) Gecko/20100101 Firefox/70.0",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/79.0.3945.88 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:71.0) Gecko/20100101 Firefox/71.0",
+]
+
+CSRF_NAMES = re.compile(r"csrf|xsrf|token|nonce|authenticity|verification", re.IGNORECASE)
+
+
+class Request:
+    def __init__(self, method, url, params=None, data=None, form=None, page=None):
+        self.method = method
+        self.url = url
+        self.params = params
+        self.data = data
+        # set for form submissions, so the transport can fill in CSRF tokens
+        self.form = form
+        self.page = page
+
+    def __repr__(self):
+        return f"Request({self.method!r}, {self.url!r})"
+
+
+def drive(test, send):
+    """Runs a test generator to completion with a blocking `send(request) -> response`."""
+    try:
+        request = next(test)
+        while True:
+            request = test.send(send(request))
+    except StopIteration as done:
+        return done.value
+
+
+async def adrive(test, send):
+    """Same as drive() with `await send(request)`."""
+    try:
+        request = next(test)
+        while True:
+            request = test.send(await send(request))
+    except StopIteration as done:
+        return done.value
+
+
+class Crawl:
+    """
+    Breadth-first crawl state. The front-end fetches a page and hands its links
+    to discover(), which returns the ones that are new and in scope. Without a
+    util.scope.Scope the scope is the target's host minus `ignore_links`.
+    """
+
+    def __init__(self, target_url, ignore_links=(), max_depth=None, max_pages=None, scope=None):
+        self.target_url = target_url
+        self.scope = scope or Scope([target_url], ignore_links)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.visited = set()
+        self.target_links = []
+
+    def start(self, url=None):
+        url = url or self.target_url
+        self.visited.add(url)
+        return url, 0
+
+    def full(self):
+        return bool(self.max_pages) and len(self.target_links) >= self.max_pages
+
+    def follow(self, depth):
+        return self.max_depth is None or depth <= self.max_depth
+
+    def discover(self, url, depth, links):
+        """Returns [(link, depth)] for links on `url` seen for the first time."""
+        found = []
+        for link in links:
+            parsed_link = urlparse.urljoin(url, link).split("#")[0]
+            if parsed_link not in self.visited and self.scope.allows(parsed_link):
+                if self.full():
+                    break
+                self.visited.add(parsed_link)
+                self.target_links.append(parsed_link)
+                found.append((parsed_link, depth + 1))
+        return found
+
+
+def form_signature(form, page_url):
+    """
+    (resolved action, method, sorted (name, type) pairs). The same search box
+    or login widget rendered on every page of a site has one signature, so it
+    only needs testing once.
+    """
+    action = urlparse.urljoin(page_url, form["action"] or "").split("#")[0]
+    fields = sorted((i["name"] or "", i["type"]) for i in form["inputs"])
+    return action, form["method"], tuple(fields)
+
+
+def index_forms(forms_per_page, scope=None):
+    """
+    [(page url, forms)] -> {signature: {"form", "url", "pages"}}, one entry per
+    unique form. Forms posting out of `scope` are left out.
+    """
+    index = {}
+    skipped = set()
+    for link, forms in forms_per_page:
+        for form in forms:
+            signature = form_signature(form, link)
+            if scope is not None and not scope.allows(signature[0]):
+                if signature[0] not in skipped:
+                    skipped.add(signature[0])
+                    print(f"[-] Skipping form posting out of scope: {signature[0]}")
+                continue
+            entry = index.setdefault(signature, {"form": form, "url": link, "pages": []})
+            entry["pages"].append(link)
+    total = sum(len(entry["pages"]) for entry in index.values())
+    print(f"[+] {total} forms on {len(forms_per_page)} pages, {len(index)} unique")
+    return index
+
+
+def csrf_fields(form):
+    """Names of hidden inputs that look like anti-CSRF tokens."""
+    return [
+        field["name"]
+        for field in form["inputs"]
+        if field["type"] == "hidden" and field["name"] and CSRF_NAMES.search(field["name"])
+    ]
+
+
+class Tokens(dict):
+    """
+    CSRF tokens of one session, name -> value. Harvested from every form the
+    session parses, used once each: fill() drops a token as it is sent.
+    """
+
+    def harvest(self, forms):
+        for form in forms:
+            names = set(csrf_fields(form))
+            for field in form["inputs"]:
+                if field["name"] in names and field["value"] is not None:
+                    self[field["name"]] = field["value"]
+
+    def missing(self, form):
+        return any(name not in self for name in csrf_fields(form))
+
+    def fill(self, form, data):
+        data = dict(data)
+        for name in csrf_fields(form):
+            if name in self:
+                data[name] = self.pop(name)
+        return data
+
+
+def form_data(form, value=None, values=None):
+    """`value` goes into every text input, `values` overrides single fields by name."""
+    post_data = {}
+    for input in form["inputs"]:
+        input_name = input["name"]
+        input_type = input["type"]
+        input_value = input["value"]
+        if values is not None:
+            input_value = values.get(input_name, input_value)
+        elif input_type == "text":
+            input_value = value
+
+        post_data[input_name] = input_value
+    return post_data
+
+
+def submit(form, url, value=None, values=None):
+    post_url = urlparse.urljoin(url, form["action"])
+    data = form_data(form, value, values)
+    if form["method"] == "post":
+        return Request("post", post_url, data=data, form=form, page=url)
+    return Request("get", post_url, params=data, form=form, page=url)
+
+
+def link_test(url):
+    """Yields requests, returns [(param, context, payload)] for every confirmed parameter."""
+    parts = urlparse.urlsplit(url)
+    params = urlparse.parse_qsl(parts.query, keep_blank_values=True)
+    names = [name for name, _ in params]
+
+    def with_values(values):
+        query = urlparse.urlencode([(name, values.get(name, value)) for name, value in params])
+        return urlparse.urlunsplit(parts._replace(query=query))
+
+    # one request with a distinct canary per parameter
+    canaries = payloads.canaries_for(names)
+    response = yield Request("get", with_values(canaries))
+    reflected = payloads.reflected(response.text, canaries)
+
+    findings = []
+    for name, contexts in reflected.items():
+        for context, payload in payloads.payloads_for(contexts):
+            response = yield Request("get", with_values({name: payload}))
+            if payload in response.text:
+                findings.append((name, context, payload))
+                break
+    return findings
+
+
+def form_test(form, url):
+    """Yields requests, returns [(field, context, payload)] for every confirmed field."""
+    names = payloads.injectable_inputs(form)
+    if not names:
+        return []
+
+    canaries = payloads.canaries_for(names)
+    response = yield submit(form, url, values=canaries)
+    reflected = payloads.reflected(response.text, canaries)
+
+    findings = []
+    for name, contexts in reflected.items():
+        for context, payload in payloads.payloads_for(contexts):
+            response = yield submit(form, url, values={name: payload})
+            if payload in response.text:
+                findings.append((name, context, payload))
+                break
+    return findings
+
+
+def form_finding(entry, field, context, payload):
+    link, form = entry["url"], entry["form"]
+    return dict(
+        kind="xss",
+        url=link,
+        pages=entry["pages"],
+        location="form",
+        action=urlparse.urljoin(link, form["action"]),
+        method=form["method"],
+        field=field,
+        context=context,
+        payload=payload,
+    )
+
+
+def link_finding(link, param, context, payload):
+    return dict(kind="xss", url=link, location="link", field=param, context=context, payload=payload)
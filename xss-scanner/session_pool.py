@@ -0,0 +1,101 @@
+import asyncio
+import contextlib
+
+import httpx
+
+from engine import Tokens, csrf_fields
+from page_cache import parse_page
+
+"""
+Pool of independent scanner sessions, each with its own cookie jar and its
+own CSRF tokens.
+
+A session is checked out exclusively for a whole form test, so concurrent
+tests never spend each other's tokens. Tokens belong to the session whose
+cookies fetched them: many apps bind a token to its session and reject it
+from any other. So a page from the shared PageCache only hands its tokens to
+the session that downloaded it, a cache hit gives none, and a session with no
+token left for a form fetches the form's page once with its own cookies
+before submitting. After that every submission response refills the token.
+
+    pool = SessionPool(size=4)
+    await pool.login(dvwa_login)          # runs once per session
+    async with pool.checkout() as session:
+        page = await session.fetch(page_cache, url)
+        response = await session.send(engine.submit(form, url, values=data))
+"""
+
+
+class Session:
+    def __init__(self, client, backend=None):
+        self.client = client
+        self.backend = backend
+        self.tokens = Tokens()
+
+    def harvest_page(self, page):
+        self.tokens.harvest(page.forms)
+
+    def harvest_response(self, response):
+        if "html" in response.headers.get("Content-Type", "html"):
+            _, forms = parse_page(response.content, self.backend)
+            self.tokens.harvest(forms)
+
+    async def fetch(self, pages, url):
+        """
+        Page through the shared cache. Tokens are only taken when this session
+        downloaded the page, another session's tokens would be rejected.
+        """
+        return await pages.get(self.client, url, on_parse=self.harvest_page)
+
+    async def refresh(self, url):
+        response = await self.client.get(url)
+        self.harvest_response(response)
+
+    async def send(self, request):
+        """
+        Sends an engine.Request. Form submissions get this session's tokens
+        filled in, a form without a token left is fetched again first and the
+        response's tokens replace the ones just spent.
+        """
+        form = request.form
+        if form is None:
+            return await self.client.request(request.method, request.url, params=request.params)
+        if self.tokens.missing(form):
+            await self.refresh(request.page)
+        if request.method == "post":
+            data = self.tokens.fill(form, request.data)
+            response = await self.client.post(request.url, data=data)
+        else:
+            params = self.tokens.fill(form, request.params)
+            response = await self.client.get(request.url, params=params)
+        if csrf_fields(form):
+            self.harvest_response(response)
+        return response
+
+
+class SessionPool:
+    def __init__(self, size=4, headers=None, backend=None):
+        self.sessions = [
+            Session(httpx.AsyncClient(headers=headers), backend=backend) for _ in range(size)
+        ]
+        self.idle = asyncio.Queue()
+        for session in self.sessions:
+            self.idle.put_nowait(session)
+
+    def __len__(self):
+        return len(self.sessions)
+
+    async def login(self, login):
+        """Runs `await login(session)` for every session, each ends up with its own cookies."""
+        await asyncio.gather(*(login(session) for session in self.sessions))
+
+    @contextlib.asynccontextmanager
+    async def checkout(self):
+        session = await self.idle.get()
+        try:
+            yield session
+        finally:
+            self.idle.put_nowait(session)
+
+    async def close(self):
+        await asyncio.gather(*(session.client.aclose() for session in self.sessions))